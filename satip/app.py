@@ -8,10 +8,12 @@ We now support
 By-default we pull the RSS data, if not available we try the HR-SERVIRI.
 We have an option to just use the IODC data.
 """
+import contextlib
 import glob
 import os
 import random
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 import click
@@ -22,7 +24,8 @@ import structlog
 import satip
 from satip import utils
 from satip.constants import RSS_ID, SEVIRI_ID, SEVIRI_IODC_ID
-from satip.eumetsat import EUMETSATDownloadManager
+from satip.eumetsat import DATA_TAILOR_MAX_CONCURRENT_JOBS, EUMETSATDownloadManager
+from satip.search_cache import DEFAULT_CLOSED_AFTER
 
 log = structlog.stdlib.get_logger()
 #sentry
@@ -119,6 +122,48 @@ sentry_sdk.set_tag("version", satip.__version__)
     help="An option to use the IODC data instead of the RSS data.",
     type=click.BOOL,
 )
+@click.option(
+    "--download-concurrency",
+    envvar="DOWNLOAD_CONCURRENCY",
+    default=1,
+    help="Number of RSS or IODC native files to download in parallel",
+    type=click.INT,
+)
+@click.option(
+    "--search-cache-dir",
+    envvar="SEARCH_CACHE_DIR",
+    default=None,
+    help="Local directory to cache EUMETSAT search results in, defaults to no cache",
+    type=click.STRING,
+)
+@click.option(
+    "--search-cache-closed-after",
+    envvar="SEARCH_CACHE_CLOSED_AFTER",
+    default=DEFAULT_CLOSED_AFTER,
+    help="How long after a time bucket ends before its search results are cached, e.g. '30min'",
+    type=click.STRING,
+)
+@click.option(
+    "--async-upload",
+    envvar="ASYNC_UPLOAD",
+    default=False,
+    help="Upload native files to the native file store in the background",
+    type=click.BOOL,
+)
+@click.option(
+    "--conversion-workers",
+    envvar="CONVERSION_WORKERS",
+    default=1,
+    help="Number of processes converting RSS or IODC native files to zarr in parallel",
+    type=click.INT,
+)
+@click.option(
+    "--lazy-conversion",
+    envvar="LAZY_CONVERSION",
+    default=False,
+    help="Convert native files to zarr chunk by chunk, bounding the memory by the chunk size",
+    type=click.BOOL,
+)
 def run_click(
     api_key,
     api_secret,
@@ -132,6 +177,12 @@ def run_click(
     use_hr_serviri: bool = False,
     maximum_n_datasets: int = -1,
     use_iodc: bool = False,
+    download_concurrency: int = 1,
+    search_cache_dir: Optional[str] = None,
+    search_cache_closed_after: str = DEFAULT_CLOSED_AFTER,
+    async_upload: bool = False,
+    conversion_workers: int = 1,
+    lazy_conversion: bool = False,
 ):
     """ See below for function description.
 
@@ -148,7 +199,13 @@ def run_click(
         cleanup=cleanup,
         use_hr_serviri=use_hr_serviri,
         maximum_n_datasets=maximum_n_datasets,
-        use_iodc=use_iodc
+        use_iodc=use_iodc,
+        download_concurrency=download_concurrency,
+        search_cache_dir=search_cache_dir,
+        search_cache_closed_after=search_cache_closed_after,
+        async_upload=async_upload,
+        conversion_workers=conversion_workers,
+        lazy_conversion=lazy_conversion,
     )
 
 
@@ -165,6 +222,12 @@ def run(
     use_hr_serviri: bool = False,
     maximum_n_datasets: int = -1,
     use_iodc: bool = False,
+    download_concurrency: int = 1,
+    search_cache_dir: Optional[str] = None,
+    search_cache_closed_after: str = DEFAULT_CLOSED_AFTER,
+    async_upload: bool = False,
+    conversion_workers: int = 1,
+    lazy_conversion: bool = False,
 ):
     """Run main application
 
@@ -180,6 +243,13 @@ def run(
         use_hr_serviri: use 15 min data, not RSS
         maximum_n_datasets: Set the maximum number of dataset to load, default gets them all
         use_iodc: Use IODC data instead
+        download_concurrency: Number of RSS or IODC native files to download in parallel
+        search_cache_dir: Local directory to cache EUMETSAT search results in
+        search_cache_closed_after: How long after a time bucket ends before its search results
+            are cached. Only buckets older than this, within `history`, are served from the cache
+        async_upload: Upload native files to the native file store in the background
+        conversion_workers: Number of processes converting native files to zarr in parallel
+        lazy_conversion: Convert native files to zarr chunk by chunk, rather than whole scenes
     """
 
     utils.setupLogging()
@@ -199,7 +269,8 @@ def run(
             memory=utils.get_memory(),
         )
         # 1. Get data from API, download native files
-        with tempfile.TemporaryDirectory() as tmpdir:
+        # The exit stack is closed before the temporary directory is removed
+        with tempfile.TemporaryDirectory() as tmpdir, contextlib.ExitStack() as exit_stack:
 
             start_date = pd.Timestamp(start_time, tz="UTC") - pd.Timedelta(history)
             log.info(
@@ -217,7 +288,12 @@ def run(
                     user_secret=api_secret,
                     data_dir=tmpdir,
                     native_file_dir=save_dir_native,
+                    search_cache_dir=search_cache_dir,
+                    search_cache_closed_after=search_cache_closed_after,
+                    async_upload=async_upload,
                 )
+                # Finish uploading the native files before they are removed
+                exit_stack.callback(download_manager.flush_uploads)
                 datasets = download_manager.identify_available_datasets(
                     start_date=start_date.strftime("%Y-%m-%d-%H:%M:%S"),
                     end_date=pd.Timestamp(start_time, tz="UTC").strftime("%Y-%m-%d-%H:%M:%S"),
@@ -231,7 +307,13 @@ def run(
                     user_secret=api_secret,
                     data_dir=tmpdir,
                     native_file_dir=save_dir_native,
+                    search_cache_dir=search_cache_dir,
+                    search_cache_closed_after=search_cache_closed_after,
+                    async_upload=async_upload,
                 )
+                # Finish uploading the native files before they are removed
+                exit_stack.callback(download_manager.flush_uploads)
+                exit_stack.callback(download_manager.flush_datatailor_cleanup)
                 if cleanup:
                     log.debug("Running Data Tailor Cleanup", memory=utils.get_memory())
                     download_manager.cleanup_datatailor()
@@ -280,54 +362,73 @@ def run(
                 random.shuffle(datasets)  # Shuffle so subsequent runs might download different data
                 updated_data = True
                 if use_hr_serviri:
-                    # Check before downloading each tailored dataset, as it can take awhile
-                    for dset in datasets:
-                        dset = utils.filter_dataset_ids_on_current_files([dset], save_dir)
-                        if len(dset) > 0:
+                    # Keep all the Data Tailor's job slots full, and convert each file to zarr
+                    # as soon as it has downloaded, while the later jobs are still running
+                    conversion_results = {}
+                    with ThreadPoolExecutor(max_workers=1) as conversion_executor:
+                        conversions = []
+                        try:
                             download_manager.download_tailored_datasets(
-                                dset,
+                                datasets,
                                 product_id=SEVIRI_ID,
+                                concurrency=DATA_TAILOR_MAX_CONCURRENT_JOBS,
+                                on_complete=lambda native_files: conversions.append(
+                                    conversion_executor.submit(
+                                        utils.save_native_to_zarr,
+                                        native_files,
+                                        save_dir=save_dir,
+                                        use_rescaler=use_rescaler,
+                                        use_hr_serviri=use_hr_serviri,
+                                        lazy=lazy_conversion,
+                                        raise_errors=False,
+                                    )
+                                ),
                             )
-                elif use_iodc:
-                    # Check before downloading each dataset, as it can take a while
-                    for dset in datasets:
-                        dset = utils.filter_dataset_ids_on_current_files([dset], save_dir)
-                        if len(dset) > 0:
-                            # note we might have to change this to the data taylor
-                            download_manager.download_datasets(
-                                dset,
-                                product_id=SEVIRI_IODC_ID,
-                            )
-
+                        finally:
+                            # Finish converting the files already downloaded, even if a later
+                            # download failed, so their errors are not lost
+                            for conversion in conversions:
+                                conversion_results.update(conversion.result())
+                    utils.check_conversion_results(conversion_results)
                 else:
-                    # Check before downloading each tailored dataset, as it can take awhile
-                    for dset in datasets:
-                        dset = utils.filter_dataset_ids_on_current_files([dset], save_dir)
-                        if len(dset) > 0:
-                            download_manager.download_datasets(
-                                dset,
-                                product_id=RSS_ID,
-                            )
+                    product_id = SEVIRI_IODC_ID if use_iodc else RSS_ID
+                    if download_concurrency > 1:
+                        # Download the whole backlog in parallel
+                        download_manager.download_datasets(
+                            datasets,
+                            product_id=product_id,
+                            concurrency=download_concurrency,
+                        )
+                    else:
+                        # Check before downloading each dataset, as it can take a while
+                        for dset in datasets:
+                            dset = utils.filter_dataset_ids_on_current_files([dset], save_dir)
+                            if len(dset) > 0:
+                                download_manager.download_datasets(
+                                    dset,
+                                    product_id=product_id,
+                                )
 
-                # 2. Load nat files to one Xarray Dataset
-                if use_hr_serviri:
-                    native_files = list(glob.glob(os.path.join(tmpdir, "*HRSEVIRI*")))
-                else:
-                    # RSS or IODC
+                    # 2. Load nat files to one Xarray Dataset
+                    # RSS or IODC, the HR-SEVIRI files are converted as they are downloaded
                     native_files = list(glob.glob(os.path.join(tmpdir, "*.nat")))
 
-                log.debug(
-                    "Saving native files to Zarr: " + native_files.__str__(),
-                    memory=utils.get_memory(),
-                )
-                # Save to S3
-                utils.save_native_to_zarr(
-                    native_files,
-                    save_dir=save_dir,
-                    use_rescaler=use_rescaler,
-                    use_hr_serviri=use_hr_serviri,
-                    use_iodc=use_iodc,
-                )
+                    log.debug(
+                        "Saving native files to Zarr: " + native_files.__str__(),
+                        memory=utils.get_memory(),
+                    )
+                    # Save to S3
+                    conversion_results = utils.save_native_to_zarr(
+                        native_files,
+                        save_dir=save_dir,
+                        use_rescaler=use_rescaler,
+                        use_hr_serviri=use_hr_serviri,
+                        use_iodc=use_iodc,
+                        workers=conversion_workers,
+                        lazy=lazy_conversion,
+                        raise_errors=False,
+                    )
+                    utils.check_conversion_results(conversion_results)
                 # Move around files into and out of latest
                 utils.move_older_files_to_different_location(
                     save_dir=save_dir, history_time=(start_date - pd.Timedelta("30 min"))
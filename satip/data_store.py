@@ -1,4 +1,15 @@
 """ Data store utils"""
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import fsspec
+import structlog
+
+from satip import utils
+
+log = structlog.stdlib.get_logger()
 
 
 def dateset_it_to_filename(dataset_id: str, tailor_id: str, dir) -> str:
@@ -20,3 +31,160 @@ def dateset_it_to_filename(dataset_id: str, tailor_id: str, dir) -> str:
         filename = f"{dir}/{dataset_id}_EPCT_{tailor_id}"
 
     return filename
+
+
+class BackgroundUploader:
+    """Uploads the raw files of datasets to the native file store in background threads
+
+    At most `max_queue_size` uploads are pending at once, `submit` blocks until there is room.
+    Call `join` before the files in `data_dir` are removed. This also stops the upload threads,
+    which are started again by the next `submit`.
+    """
+
+    def __init__(self, data_dir: str, native_file_dir: str, max_queue_size: int = 8, workers=2):
+        """Init
+
+        :param data_dir: directory where the downloaded files are
+        :param native_file_dir: native file store to upload the files to
+        :param max_queue_size: maximum number of pending uploads
+        :param workers: number of uploads to run at the same time
+        """
+        self.data_dir = data_dir
+        self.native_file_dir = native_file_dir
+        self.workers = workers
+
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(max_queue_size)
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, dataset_id: str):
+        """Queue the files of dataset_id for upload, waiting if the queue is full
+
+        :param dataset_id: dataset id to upload the files of
+        """
+        self._slots.acquire()
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers)
+            future = self._executor.submit(
+                utils.move_files,
+                dataset_id=dataset_id,
+                data_dir_from=self.data_dir,
+                data_dir_to=self.native_file_dir,
+            )
+            self._futures[dataset_id] = future
+        future.add_done_callback(lambda _: self._slots.release())
+
+    def join(self) -> list:
+        """Wait for all the queued uploads to finish
+
+        :return: list of dataset ids which failed to upload
+        """
+        with self._lock:
+            futures, self._futures = self._futures, {}
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+        failed_dataset_ids = []
+        for dataset_id, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                failed_dataset_ids.append(dataset_id)
+                log.error(f"Failed to upload {dataset_id} to {self.native_file_dir}: {e}")
+
+        log.info(
+            f"Uploaded {len(futures) - len(failed_dataset_ids)} of {len(futures)} datasets "
+            f"to the native file store ({self.native_file_dir})"
+        )
+        if len(failed_dataset_ids) > 0:
+            log.error(f"Failed to upload datasets {failed_dataset_ids}")
+        return failed_dataset_ids
+
+
+def tee_stream(
+    stream,
+    local_filename: str,
+    remote_filename: str,
+    chunk_size: int = 1024 * 1024,
+    upload_block_size: int = 5 * 1024 * 1024,
+    max_queued_chunks: int = 8,
+) -> int:
+    """Write a stream to a local file and to the native file store in a single pass
+
+    The local file is written in the calling thread, while a background thread uploads the
+    same chunks, so the upload no longer waits for the whole local copy to finish.
+    If either write fails the partial remote file is removed and the error is raised.
+
+    :param stream: file-like object to read from
+    :param local_filename: local file to write to
+    :param remote_filename: file in the native file store to write to
+    :param chunk_size: number of bytes read from the stream at a time
+    :param upload_block_size: number of bytes buffered before each write to the store
+    :param max_queued_chunks: maximum number of chunks read but not yet uploaded
+    :return: number of bytes written
+    """
+    fs = fsspec.open(remote_filename).fs
+    fs.makedirs(os.path.dirname(remote_filename), exist_ok=True)
+
+    chunks = queue.Queue(maxsize=max_queued_chunks)
+    upload_errors = []
+
+    def upload():
+        remote_file = None
+        end_of_stream = False
+        try:
+            remote_file = fs.open(remote_filename, mode="wb", block_size=upload_block_size)
+            while True:
+                chunk = chunks.get()
+                if chunk is None:
+                    end_of_stream = True
+                    break
+                remote_file.write(chunk)
+            # on S3 this completes the multipart upload, so it can fail too
+            remote_file.close()
+        except Exception as e:
+            upload_errors.append(e)
+            # keep taking chunks, so the local write never blocks on a full queue
+            if not end_of_stream:
+                while chunks.get() is not None:
+                    pass
+        finally:
+            if remote_file is not None and not remote_file.closed:
+                try:
+                    remote_file.close()
+                except Exception:
+                    pass
+
+    uploader = threading.Thread(target=upload, daemon=True)
+    uploader.start()
+
+    n_bytes = 0
+    try:
+        with open(local_filename, mode="wb") as local_file:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                local_file.write(chunk)
+                n_bytes += len(chunk)
+                if len(upload_errors) == 0:
+                    chunks.put(chunk)
+    except Exception:
+        upload_errors.append(None)
+        raise
+    finally:
+        chunks.put(None)
+        uploader.join()
+        if len(upload_errors) > 0:
+            try:
+                fs.rm(remote_filename)
+            except Exception:
+                pass
+
+    if len(upload_errors) > 0:
+        raise upload_errors[0]
+
+    return n_bytes
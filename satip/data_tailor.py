@@ -0,0 +1,285 @@
+"""Helpers for running many EUMETSAT Data Tailor customisations at the same time.
+
+Usage example:
+  from satip.data_tailor import CustomisationMonitor, CustomisationReaper
+  monitor = CustomisationMonitor(lambda: eumdac.DataTailor(token))
+  status = monitor.wait(customisation._id, timeout=15 * 60)
+  reaper = CustomisationReaper(monitor)
+  reaper.delete(customisation)
+"""
+
+import threading
+import time
+from typing import Callable, List, Tuple
+
+import structlog
+
+log = structlog.stdlib.get_logger()
+
+# Statuses after which a customisation will not change any more
+FINISHED_STATUSES = ("DONE", "FAILED", "KILLED", "ERROR", "DELETED")
+
+# Statuses of customisations which hold a Data Tailor slot without doing any work
+STUCK_STATUSES = ("INACTIVE", "FAILED")
+
+# Longest time to wait for the queued deletions when stopping the reaper. Deletions still
+# running after this are left to the background thread, or the `--cleanup` job.
+REAPER_STOP_TIMEOUT_SECONDS = 60
+
+
+class CustomisationMonitor:
+    """
+    Shared poller of the status of Data Tailor customisations.
+
+    One background thread lists all the customisations in a single request, and wakes the
+    jobs waiting on any of them. The polling interval starts at `min_interval` and doubles,
+    up to `max_interval`, while none of the watched customisations change status.
+    """
+
+    def __init__(
+        self,
+        get_datatailor: Callable,
+        min_interval: float = 2,
+        max_interval: float = 30,
+    ):
+        """Init
+
+        Args:
+            get_datatailor: Function returning the eumdac DataTailor to poll with
+            min_interval: Shortest time between polls, in seconds
+            max_interval: Longest time between polls, in seconds
+        """
+        self.get_datatailor = get_datatailor
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+
+        self._condition = threading.Condition()
+        self._customisations = []
+        self._statuses = {}
+        self._listed_at = float("-inf")
+        self._interval = min_interval
+        self._watched = set()
+        self._thread = None
+
+    def customisations(self, max_age: float = None) -> List[Tuple[object, str]]:
+        """
+        Get all the customisations and their statuses, from one listing shared by all callers
+
+        Args:
+            max_age: Re-list the customisations if the last listing is older than this many
+                seconds, defaults to `min_interval`
+
+        Returns:
+            List of (customisation, status) tuples
+        """
+        max_age = self.min_interval if max_age is None else max_age
+        with self._condition:
+            if time.monotonic() - self._listed_at > max_age:
+                self._poll()
+            return [(c, self._statuses[c._id]) for c in self._customisations]
+
+    def wait(self, customisation_id: str, timeout: float) -> str:
+        """
+        Wait until a customisation has finished, or the timeout has passed
+
+        Args:
+            customisation_id: ID of the customisation to wait for
+            timeout: Maximum number of seconds to wait
+
+        Returns:
+            The last known status of the customisation, None if it was never seen
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self._watched.add(customisation_id)
+            # Poll promptly for the new customisation
+            self._interval = self.min_interval
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+            try:
+                while True:
+                    status = self._statuses.get(customisation_id)
+                    remaining = deadline - time.monotonic()
+                    if status in FINISHED_STATUSES or remaining <= 0:
+                        return status
+                    self._condition.wait(remaining)
+            finally:
+                self._watched.discard(customisation_id)
+
+    def _run(self):
+        """Poll the customisations until no one is waiting on them"""
+        with self._condition:
+            while len(self._watched) > 0:
+                previous_statuses = {c: self._statuses.get(c) for c in self._watched}
+                try:
+                    self._poll()
+                except Exception as e:
+                    log.warn(f"Failed to list Data Tailor customisations: {e}")
+
+                changed = any(self._statuses.get(c) != s for c, s in previous_statuses.items())
+                if changed:
+                    self._interval = self.min_interval
+                else:
+                    self._interval = min(self._interval * 2, self.max_interval)
+
+                self._condition.notify_all()
+                self._condition.wait(self._interval)
+
+            self._thread = None
+
+    def _poll(self):
+        """List all the customisations in one request, the lock must be held"""
+        customisations = self.get_datatailor().customisations
+        # eumdac caches the listed status briefly, so read them straight away
+        self._statuses = {c._id: c.status for c in customisations}
+        self._customisations = customisations
+        self._listed_at = time.monotonic()
+        log.debug(
+            f"Polled {len(customisations)} Data Tailor customisations, "
+            f"next poll in {self._interval} seconds"
+        )
+
+
+class CustomisationReaper:
+    """
+    Background cleaner of Data Tailor customisations.
+
+    Every `interval` seconds, or when woken, a background thread kills and deletes the
+    customisations which are stuck holding a slot, and deletes the ones handed to `delete`
+    once their outputs have been downloaded. Killing and deleting can each take about a
+    minute, so this keeps them out of the downloads waiting on a slot or an output.
+    """
+
+    def __init__(self, monitor: CustomisationMonitor, interval: float = 30):
+        """Init
+
+        Args:
+            monitor: Monitor listing the customisations
+            interval: Time between clean ups, in seconds
+        """
+        self.monitor = monitor
+        self.interval = interval
+        self.reclaimed_slots = 0
+        self.seconds_cleaning = 0.0
+
+        self._condition = threading.Condition()
+        self._pending = {}
+        self._reaped_ids = set()
+        self._sweep_requested = False
+        self._stopping = False
+        self._thread = None
+
+    def delete(self, customisation):
+        """Queue a customisation for deletion, without waiting for it to be deleted"""
+        with self._condition:
+            self._pending[customisation._id] = customisation
+            self._start()
+            self._condition.notify_all()
+
+    def wake(self):
+        """Clean up now, rather than at the next scheduled time"""
+        with self._condition:
+            self._sweep_requested = True
+            self._start()
+            self._condition.notify_all()
+
+    def stop(self, timeout: float = REAPER_STOP_TIMEOUT_SECONDS) -> bool:
+        """
+        Delete the queued customisations, then stop the background thread
+
+        Args:
+            timeout: Maximum number of seconds to wait for the deletions. Any left after this
+                carry on in the background thread, until the process exits.
+
+        Returns:
+            Whether all the queued customisations were deleted in time
+        """
+        with self._condition:
+            thread = self._thread
+            self._stopping = True
+            self._condition.notify_all()
+        if thread is not None:
+            thread.join(timeout)
+        finished = thread is None or not thread.is_alive()
+
+        log.info(
+            f"Data Tailor clean up reclaimed {self.reclaimed_slots} slots, "
+            f"spending {self.seconds_cleaning:.1f} seconds killing and deleting customisations "
+            "outside of the downloads"
+        )
+        if not finished:
+            log.warn(
+                f"Data Tailor clean up did not finish within {timeout} seconds, "
+                "leaving the remaining customisations to the --cleanup job"
+            )
+        return finished
+
+    def _start(self):
+        """Start the background thread, the lock must be held"""
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """Clean up on schedule, until stopped"""
+        while True:
+            with self._condition:
+                scheduled = False
+                if not (self._stopping or self._sweep_requested or len(self._pending) > 0):
+                    scheduled = not self._condition.wait(self.interval)
+                pending, self._pending = self._pending, {}
+                stopping = self._stopping
+                sweep = self._sweep_requested or (scheduled and not stopping)
+                self._sweep_requested = False
+
+            self._reap(pending, sweep=sweep)
+
+            if stopping:
+                with self._condition:
+                    if len(self._pending) == 0:
+                        self._thread = None
+                        return
+
+    def _reap(self, pending: dict, sweep: bool = True):
+        """
+        Delete the queued customisations, and the stuck ones if `sweep`
+
+        Args:
+            pending: Customisations to delete, keyed by ID
+            sweep: Whether to also look for stuck customisations
+        """
+        to_reap = [(c, None) for c in pending.values()]
+        if sweep:
+            try:
+                to_reap += [
+                    (c, status)
+                    for c, status in self.monitor.customisations()
+                    if status in STUCK_STATUSES
+                    and c._id not in pending
+                    and c._id not in self._reaped_ids
+                ]
+            except Exception as e:
+                log.warn(f"Failed to list Data Tailor customisations to clean up: {e}")
+
+        for customisation, status in to_reap:
+            start = time.monotonic()
+            try:
+                if status == "INACTIVE":
+                    customisation.kill()
+                customisation.delete()
+            except Exception as e:
+                log.debug(f"Failed to clean up customisation {customisation._id}: {e}")
+                continue
+            finally:
+                self.seconds_cleaning += time.monotonic() - start
+
+            self._reaped_ids.add(customisation._id)
+            self.reclaimed_slots += 1
+            log.debug(
+                f"Cleaned up {status or 'finished'} customisation {customisation._id} "
+                f"in {time.monotonic() - start:.1f} seconds"
+            )
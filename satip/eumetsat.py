@@ -12,23 +12,34 @@ Usage example:
 
 import datetime
 import fnmatch
+import functools
 import os
 import re
-import shutil
+import threading
 import time
 import urllib
 import zipfile
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from io import BytesIO
+from typing import Any, Callable, Tuple
 from urllib.error import HTTPError
 
 import eumdac
 import fsspec
+import pandas as pd
 import requests
 import structlog
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from satip import utils
-from satip.data_store import dateset_it_to_filename
+from satip.data_store import BackgroundUploader, dateset_it_to_filename, tee_stream
+from satip.data_tailor import (
+    REAPER_STOP_TIMEOUT_SECONDS,
+    CustomisationMonitor,
+    CustomisationReaper,
+)
+from satip.rate_limit import RateLimitedAdapter, TokenBucket
+from satip.search_cache import DEFAULT_CLOSED_AFTER, SearchResultCache, datasets_in_range
 
 log = structlog.stdlib.get_logger()
 
@@ -47,31 +58,194 @@ API_TAILORED_DOWNLOAD_ENDPOINT = API_ENDPOINT + "/epcs/download"
 # Data Tailor time out
 DATA_TAILOR_TIMEOUT_LIMIT_MINUTES = 15
 
+# Number of customisations the Data Tailor runs at the same time
+DATA_TAILOR_MAX_CONCURRENT_JOBS = 3
 
-def _request_access_token(user_key, user_secret):
+# Size of the chunks streamed to disk when downloading a dataset, and how many times an
+# interrupted download is resumed
+DOWNLOAD_CHUNK_SIZE_BYTES = 1024 * 1024
+DOWNLOAD_MAX_RESUME_ATTEMPTS = 5
+
+# (connect, read) timeouts of dataset downloads, in seconds. Without a read timeout a stalled
+# connection never raises, so the download is never resumed
+DOWNLOAD_TIMEOUT_SECONDS = (10, 60)
+
+# S3 multipart uploads need parts of at least 5 MB
+UPLOAD_BLOCK_SIZE_BYTES = 5 * 1024 * 1024
+
+# Sub-directory of the data directory holding partially downloaded datasets
+PARTIAL_DOWNLOAD_DIR = ".partial"
+
+# Lifetime assumed for access tokens if the API does not say, and how long before expiry
+# they are refreshed
+ACCESS_TOKEN_DEFAULT_EXPIRY = 3600
+ACCESS_TOKEN_REFRESH_MARGIN_SECONDS = 60
+
+# Length of the sub-windows, and how many are searched at once, in windowed searches
+SEARCH_WINDOW = "1D"
+SEARCH_CONCURRENCY = 4
+
+# Connection pool size and transport level retries of the HTTP session
+HTTP_POOL_SIZE = 10
+HTTP_MAX_RETRIES = 3
+
+
+def _make_session(
+    pool_size: int = HTTP_POOL_SIZE,
+    max_retries: int = HTTP_MAX_RETRIES,
+    request_limiter: TokenBucket = None,
+) -> requests.Session:
+    """
+    Makes a HTTP session which keeps connections to the EUMETSAT API alive
+
+    Args:
+        pool_size: Maximum number of connections kept open to the API
+        max_retries: Number of retries on connection errors and throttled or 5xx responses
+        request_limiter: Token bucket limiting the requests per second, defaults to no limit
+
+    Returns:
+        session: requests Session with a pooled, retrying adapter
+    """
+    retries = Retry(
+        total=max_retries,
+        backoff_factor=1,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET", "POST"],
+        raise_on_status=False,
+    )
+    adapter_kwargs = dict(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+    if request_limiter is None:
+        adapter = HTTPAdapter(**adapter_kwargs)
+    else:
+        adapter = RateLimitedAdapter(request_limiter, **adapter_kwargs)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    return session
+
+
+def _rate_limit_state_file(rate_limit_dir: str, name: str) -> str:
+    """Get the file to share a rate limit between processes in, or None to not share it"""
+    if rate_limit_dir is None:
+        return None
+    return os.path.join(rate_limit_dir, f"{name}.json")
+
+
+def _request_access_token(user_key, user_secret, session: requests.Session = None):
     """
     Requests an access token from the EUMETSAT data API
 
     Args:
         user_key: EUMETSAT API key
         user_secret: EUMETSAT API secret
+        session: HTTP session to make the request with, defaults to a new connection
 
     Returns:
         access_token: API access token
 
     """
 
+    access_token, _ = _request_access_token_and_expiry(user_key, user_secret, session=session)
+
+    return access_token
+
+
+def _request_access_token_and_expiry(
+    user_key, user_secret, session: requests.Session = None
+) -> Tuple[str, float]:
+    """
+    Requests an access token from the EUMETSAT data API, along with its lifetime
+
+    Args:
+        user_key: EUMETSAT API key
+        user_secret: EUMETSAT API secret
+        session: HTTP session to make the request with, defaults to a new connection
+
+    Returns:
+        access_token: API access token
+        expires_in: Number of seconds the token is valid for
+    """
+
     token_url = "https://api.eumetsat.int/token"
 
-    r = requests.post(
+    r = (session or requests).post(
         token_url,
         auth=requests.auth.HTTPBasicAuth(user_key, user_secret),
         data={"grant_type": "client_credentials"},
         headers={"Content-Type": "application/x-www-form-urlencoded"},
     )
-    access_token = r.json()["access_token"]
+    r.raise_for_status()
+    r_json = r.json()
+
+    return r_json["access_token"], float(r_json.get("expires_in", ACCESS_TOKEN_DEFAULT_EXPIRY))
 
-    return access_token
+
+class AccessTokenCache:
+    """
+    Thread-safe cache of an access token, refreshed shortly before it expires.
+
+    The token is requested with `request_token`, which returns the token and the number of
+    seconds it is valid for. The cache is shared between threads, so concurrent downloads use
+    the same token and only one of them refreshes it.
+    """
+
+    def __init__(
+        self,
+        request_token: Callable[[], Tuple[Any, float]],
+        refresh_margin_seconds: float = ACCESS_TOKEN_REFRESH_MARGIN_SECONDS,
+    ):
+        """Init
+
+        Args:
+            request_token: Function returning a new token and its lifetime in seconds
+            refresh_margin_seconds: Refresh the token this many seconds before it expires
+        """
+        self.request_token = request_token
+        self.refresh_margin_seconds = refresh_margin_seconds
+
+        self._lock = threading.Lock()
+        self._token = None
+        self._expires_at = 0.0
+
+    @property
+    def expires_at(self) -> float:
+        """Time, from `time.monotonic`, at which the cached token expires"""
+        return self._expires_at
+
+    def get(self):
+        """Get the cached token, refreshing it if it is missing or about to expire"""
+        with self._lock:
+            if (
+                self._token is None
+                or time.monotonic() >= self._expires_at - self.refresh_margin_seconds
+            ):
+                self._refresh()
+            return self._token
+
+    def refresh(self):
+        """Request a new token, regardless of the expiry of the cached one"""
+        with self._lock:
+            self._refresh()
+            return self._token
+
+    def invalidate(self, token=None):
+        """Drop the cached token, so the next `get` requests a new one
+
+        Args:
+            token: Only drop the cached token if it is this token. This stops several threads
+                which failed with the same token from each requesting a new one.
+        """
+        with self._lock:
+            if token is None or token == self._token:
+                self._token = None
+
+    def _refresh(self):
+        """Request a new token, the lock must be held"""
+        self._token, expires_in = self.request_token()
+        self._expires_at = time.monotonic() + expires_in
+        log.debug(f"Refreshed access token, valid for {expires_in} seconds")
 
 
 def query_data_products(
@@ -80,6 +254,7 @@ def query_data_products(
     start_index: int = 0,
     num_features: int = 10_000,
     product_id: str = "EO:EUM:DAT:MSG:MSG15-RSS",
+    session: requests.Session = None,
 ) -> requests.models.Response:
     """Queries the EUMETSAT-API for the specified product and date-range.
 
@@ -95,6 +270,7 @@ def query_data_products(
         start_index: Starting index of returned entries
         num_features: Number of returned entries
         product_id: ID of the EUMETSAT product requested
+        session: HTTP session to make the request with, defaults to a new connection
 
     Returns:
         r: Response from the request
@@ -112,14 +288,17 @@ def query_data_products(
         "dtend": utils.format_dt_str(end_date),
     }
 
-    r = requests.get(search_url, params=params)
+    r = (session or requests).get(search_url, params=params)
     r.raise_for_status()
 
     return r
 
 
 def identify_available_datasets(
-    start_date: str, end_date: str, product_id: str = "EO:EUM:DAT:MSG:MSG15-RSS"
+    start_date: str,
+    end_date: str,
+    product_id: str = "EO:EUM:DAT:MSG:MSG15-RSS",
+    session: requests.Session = None,
 ):
     """Identifies available datasets from the EUMETSAT data API
 
@@ -130,7 +309,7 @@ def identify_available_datasets(
         start_date: Start of the query period
         end_date: End of the query period
         product_id: ID of the EUMETSAT product requested
-        log: logger to send log messages to, set to None for no logging
+        session: HTTP session to make the requests with, defaults to a new connection
 
     Returns:
         JSON-formatted response from the request
@@ -140,7 +319,9 @@ def identify_available_datasets(
         productID=product_id,
     )
 
-    r_json = query_data_products(start_date, end_date, product_id=product_id).json()
+    r_json = query_data_products(
+        start_date, end_date, product_id=product_id, session=session
+    ).json()
 
     num_total_results = r_json["totalResults"]
     if log:
@@ -164,7 +345,11 @@ def identify_available_datasets(
             num_features = num_total_results - len(datasets)
 
         batch_r_json = query_data_products(
-            start_date, new_end_date, num_features=num_features, product_id=product_id
+            start_date,
+            new_end_date,
+            num_features=num_features,
+            product_id=product_id,
+            session=session,
         ).json()
         new_end_date = batch_r_json["features"][-1]["properties"]["date"].split("/")[1]
         datasets = datasets + batch_r_json["features"]
@@ -178,6 +363,143 @@ def identify_available_datasets(
     return datasets
 
 
+def identify_available_datasets_in_windows(
+    start_date: str,
+    end_date: str,
+    product_id: str = "EO:EUM:DAT:MSG:MSG15-RSS",
+    window: str = SEARCH_WINDOW,
+    concurrency: int = SEARCH_CONCURRENCY,
+    session: requests.Session = None,
+):
+    """Identifies available datasets, searching sub-windows of the date-range in parallel
+
+    `identify_available_datasets` pages through the results one page after another, as each
+    page ends where the previous one finished. Splitting a long date-range into sub-windows
+    lets the windows be searched concurrently. Products found in more than one window are
+    only returned once.
+
+    Args:
+        start_date: Start of the query period
+        end_date: End of the query period
+        product_id: ID of the EUMETSAT product requested
+        window: Length of each sub-window, any frequency string understood by pandas
+        concurrency: Number of sub-windows to search at the same time
+        session: HTTP session to make the requests with, defaults to a new connection
+
+    Returns:
+        List of datasets, de-duplicated by product id and sorted newest first like the API
+    """
+    start = pd.to_datetime(start_date)
+    end = pd.to_datetime(end_date)
+    edges = list(pd.date_range(start, end, freq=window))
+    if len(edges) == 0 or edges[0] > start:
+        edges.insert(0, start)
+    if edges[-1] < end:
+        edges.append(end)
+    windows = list(zip(edges[:-1], edges[1:]))
+
+    log.info(
+        f"Searching {len(windows)} windows of {window} between {start_date} and {end_date}",
+        productID=product_id,
+    )
+
+    datasets_by_id = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(
+                identify_available_datasets,
+                window_start.isoformat(),
+                window_end.isoformat(),
+                product_id=product_id,
+                session=session,
+            )
+            for window_start, window_end in windows
+        ]
+
+        for future in as_completed(futures):
+            for dataset in future.result():
+                datasets_by_id[dataset["id"]] = dataset
+
+    datasets = sorted(
+        datasets_by_id.values(),
+        key=lambda dataset: (dataset["properties"]["date"], dataset["id"]),
+        reverse=True,
+    )
+    log.info(f"Found {len(datasets)} EUMETSAT dataset files", productID=product_id)
+
+    return datasets
+
+
+def identify_available_datasets_with_cache(
+    start_date: str,
+    end_date: str,
+    product_id: str = "EO:EUM:DAT:MSG:MSG15-RSS",
+    cache: SearchResultCache = None,
+    session: requests.Session = None,
+):
+    """Identifies available datasets, serving closed time buckets from a local cache
+
+    The date-range is split into the buckets of `cache`. Closed buckets which are in the cache
+    are read from disk, and the rest are searched for in the API, merging neighbouring buckets
+    into one search. The results of newly searched closed buckets are added to the cache.
+
+    Args:
+        start_date: Start of the query period
+        end_date: End of the query period
+        product_id: ID of the EUMETSAT product requested
+        cache: Cache of search results
+        session: HTTP session to make the requests with, defaults to a new connection
+
+    Returns:
+        List of datasets, de-duplicated by product id and sorted newest first like the API
+    """
+    datasets_by_id = {}
+    runs_to_search = []
+    for bucket_start in cache.buckets(start_date, end_date):
+        cached_datasets = None
+        if cache.is_closed(bucket_start):
+            cached_datasets = cache.get(product_id, bucket_start)
+
+        if cached_datasets is not None:
+            datasets_by_id.update({dataset["id"]: dataset for dataset in cached_datasets})
+        elif runs_to_search and runs_to_search[-1][-1] + cache.bucket == bucket_start:
+            runs_to_search[-1].append(bucket_start)
+        else:
+            runs_to_search.append([bucket_start])
+
+    log.debug(
+        f"Searching {sum(len(run) for run in runs_to_search)} uncached time buckets "
+        f"in {len(runs_to_search)} searches",
+        productID=product_id,
+    )
+    for run in runs_to_search:
+        run_datasets = identify_available_datasets(
+            run[0].isoformat(),
+            (run[-1] + cache.bucket).isoformat(),
+            product_id=product_id,
+            session=session,
+        )
+        datasets_by_id.update({dataset["id"]: dataset for dataset in run_datasets})
+
+        for bucket_start in run:
+            if cache.is_closed(bucket_start):
+                cache.put(
+                    product_id,
+                    bucket_start,
+                    datasets_in_range(run_datasets, bucket_start, bucket_start + cache.bucket),
+                )
+    cache.evict()
+
+    datasets = sorted(
+        datasets_in_range(list(datasets_by_id.values()), start_date, end_date),
+        key=lambda dataset: (dataset["properties"]["date"], dataset["id"]),
+        reverse=True,
+    )
+    log.info(f"Found {len(datasets)} EUMETSAT dataset files", productID=product_id)
+
+    return datasets
+
+
 # TODO: Passing the access token is redundant, as we call the API with the token in params-arg.
 def dataset_id_to_link(collection_id, data_id, access_token):
     """Generates a link for the get request.
@@ -240,11 +562,24 @@ class EUMETSATDownloadManager:
         user_secret: str,
         data_dir: str,
         native_file_dir: str = ".",
+        pool_size: int = HTTP_POOL_SIZE,
+        max_retries: int = HTTP_MAX_RETRIES,
+        search_cache_dir: str = None,
+        search_cache_closed_after: str = DEFAULT_CLOSED_AFTER,
+        max_requests_per_second: float = None,
+        max_bytes_per_second: float = None,
+        rate_limit_dir: str = None,
+        async_upload: bool = False,
+        upload_queue_size: int = 8,
+        stream_chunk_size: int = DOWNLOAD_CHUNK_SIZE_BYTES,
+        upload_block_size: int = UPLOAD_BLOCK_SIZE_BYTES,
+        download_timeout: Tuple[float, float] = DOWNLOAD_TIMEOUT_SECONDS,
     ):
         """Download manager initialisation
 
         Initialises the download manager by:
-        * Requesting an API access token
+        * Opening a pooled HTTP session, shared by all API calls
+        * Requesting an API access token, which is cached and refreshed before it expires
         * Configuring the download directory
         * Adding satip helper functions
 
@@ -253,20 +588,77 @@ class EUMETSATDownloadManager:
             user_secret: EUMETSAT API secret
             data_dir: Path to the directory where the satellite data will be saved
             native_file_dir: this is where the native files are saved
+            pool_size: Maximum number of connections kept open to the API
+            max_retries: Number of transport level retries for each API call
+            search_cache_dir: Local directory to cache search results in. If set, searches
+                only query the API for time buckets which are not in the cache
+            search_cache_closed_after: How long after a time bucket ends before its search
+                results are cached. Make this longer than the delay in publishing products
+            max_requests_per_second: Limit on the rate of API requests, defaults to no limit
+            max_bytes_per_second: Limit on the download bandwidth, defaults to no limit
+            rate_limit_dir: Directory to keep the rate limit state in. Download managers in
+                different processes using the same directory share the rate limits.
+            async_upload: Upload downloaded files to the native file store in the background.
+                Call `flush_uploads` before the files in `data_dir` are removed.
+            upload_queue_size: Maximum number of pending background uploads
+            stream_chunk_size: Number of bytes read at a time from the Data Tailor output
+            upload_block_size: Number of bytes buffered before each write of the Data Tailor
+                output to the native file store
+            download_timeout: (connect, read) timeouts of dataset downloads, in seconds
 
         Returns:
             download_manager: Instance of the DownloadManager class
         """
 
+        request_limiter = None
+        if max_requests_per_second is not None:
+            request_limiter = TokenBucket(
+                max_requests_per_second,
+                state_file=_rate_limit_state_file(rate_limit_dir, "requests"),
+            )
+        self.bandwidth_limiter = None
+        if max_bytes_per_second is not None:
+            self.bandwidth_limiter = TokenBucket(
+                max_bytes_per_second,
+                state_file=_rate_limit_state_file(rate_limit_dir, "bytes"),
+            )
+
+        self.session = _make_session(
+            pool_size=pool_size, max_retries=max_retries, request_limiter=request_limiter
+        )
+
         # Requesting the API access token
         self.user_key = user_key
         self.user_secret = user_secret
 
+        self.token_cache = AccessTokenCache(
+            lambda: _request_access_token_and_expiry(
+                self.user_key, self.user_secret, session=self.session
+            )
+        )
+        self.eumdac_token_cache = AccessTokenCache(self._request_eumdac_token)
+        self._eumdac_clients_lock = threading.Lock()
+        self._eumdac_clients_token = None
+        self._eumdac_clients = None
+        self.datatailor_monitor = CustomisationMonitor(lambda: self.eumdac_datatailor)
+        self.datatailor_reaper = CustomisationReaper(self.datatailor_monitor)
+
         self.request_access_token()
 
         # Configuring the data directory
         self.data_dir = data_dir
         self.native_file_dir = native_file_dir
+        self.native_file_index = None
+        self.stream_chunk_size = stream_chunk_size
+        self.upload_block_size = upload_block_size
+        self.download_timeout = download_timeout
+        self.uploader = None
+        if async_upload:
+            self.uploader = BackgroundUploader(
+                data_dir=self.data_dir,
+                native_file_dir=self.native_file_dir,
+                max_queue_size=upload_queue_size,
+            )
 
         if not os.path.exists(self.data_dir):
             try:
@@ -275,8 +667,19 @@ class EUMETSATDownloadManager:
                 raise PermissionError(f"No permission to create {self.data_dir}.")
 
         # Adding satip helper functions
-        self.identify_available_datasets = identify_available_datasets
-        self.query_data_products = query_data_products
+        self.identify_available_datasets = functools.partial(
+            identify_available_datasets, session=self.session
+        )
+        if search_cache_dir is not None:
+            self.identify_available_datasets = functools.partial(
+                identify_available_datasets_with_cache,
+                cache=SearchResultCache(search_cache_dir, closed_after=search_cache_closed_after),
+                session=self.session,
+            )
+        self.identify_available_datasets_in_windows = functools.partial(
+            identify_available_datasets_in_windows, session=self.session
+        )
+        self.query_data_products = functools.partial(query_data_products, session=self.session)
 
         return
 
@@ -286,40 +689,161 @@ class EUMETSATDownloadManager:
         If no key or secret are provided then they will default
         to the values provided in the download manager initialisation.
 
-        The requested token is stored in the respective class field.
+        The requested token is stored in the token cache, which refreshes it
+        shortly before it expires.
 
         Args:
             user_key: EUMETSAT API key
             user_secret: EUMETSAT API secret
         """
 
-        if user_key is None:
-            user_key = self.user_key
-        if user_secret is None:
-            user_secret = self.user_secret
+        if user_key is not None:
+            self.user_key = user_key
+        if user_secret is not None:
+            self.user_secret = user_secret
 
-        self.access_token = _request_access_token(user_key, user_secret)
+        self.token_cache.refresh()
 
         return
 
-    def download_single_dataset(self, data_link: str):
+    @property
+    def access_token(self) -> str:
+        """Access token for the EUMETSAT data API, refreshed shortly before it expires"""
+        return self.token_cache.get()
+
+    def _request_eumdac_token(self) -> Tuple[eumdac.AccessToken, float]:
+        """Requests an eumdac access token, for the Data Store and Data Tailor clients
+
+        Returns:
+            token: eumdac AccessToken
+            expires_in: Number of seconds the token is valid for
+        """
+        token = eumdac.AccessToken((self.user_key, self.user_secret))
+        expires_in = (token.expiration - datetime.datetime.now()).total_seconds()
+
+        return token, expires_in
+
+    def _get_eumdac_clients(self) -> Tuple[eumdac.DataStore, eumdac.DataTailor]:
+        """Get the shared eumdac clients, making new ones when the eumdac token is refreshed
+
+        Returns:
+            datastore: eumdac DataStore
+            datatailor: eumdac DataTailor
+        """
+        token = self.eumdac_token_cache.get()
+        with self._eumdac_clients_lock:
+            if self._eumdac_clients_token is not token:
+                self._eumdac_clients = (eumdac.DataStore(token), eumdac.DataTailor(token))
+                self._eumdac_clients_token = token
+            return self._eumdac_clients
+
+    @property
+    def eumdac_datastore(self) -> eumdac.DataStore:
+        """Shared eumdac Data Store client, used by all the tailored downloads"""
+        return self._get_eumdac_clients()[0]
+
+    @property
+    def eumdac_datatailor(self) -> eumdac.DataTailor:
+        """Shared eumdac Data Tailor client, used by all the tailored downloads"""
+        return self._get_eumdac_clients()[1]
+
+    def download_single_dataset(
+        self, data_link: str, max_attempts: int = DOWNLOAD_MAX_RESUME_ATTEMPTS
+    ) -> int:
         """Downloads a single dataset from the EUMETSAT API
 
+        The zip is streamed to a `.part` file. If the transfer breaks, it is resumed from the
+        last byte on disk with a HTTP Range request, so only the missing tail is fetched again.
+        A `.part` file left by an earlier failed call is resumed in the same way.
+
         Args:
             data_link: Url link for the relevant dataset
+            max_attempts: Number of times to start or resume the transfer
+
+        Returns:
+            Number of bytes downloaded
         """
 
         log.info(f"Downloading one file: {data_link}", parent="DownloadManager")
 
-        params = {"access_token": self.access_token}
+        product_name = urllib.parse.unquote(urllib.parse.urlparse(data_link).path.split("/")[-1])
+        partial_dir = os.path.join(self.data_dir, PARTIAL_DOWNLOAD_DIR)
+        os.makedirs(partial_dir, exist_ok=True)
+        part_filename = os.path.join(partial_dir, f"{product_name}.zip.part")
+
+        n_bytes = 0
+        expected_bytes = None
+        for attempt in range(max_attempts):
+            n_bytes_on_disk = (
+                os.path.getsize(part_filename) if os.path.exists(part_filename) else 0
+            )
+            headers = {"Range": f"bytes={n_bytes_on_disk}-"} if n_bytes_on_disk > 0 else {}
+            params = {"access_token": self.access_token}
+
+            try:
+                with self.session.get(
+                    data_link,
+                    params=params,
+                    headers=headers,
+                    stream=True,
+                    timeout=self.download_timeout,
+                ) as r:
+                    if r.status_code == 416:
+                        # The part file already holds the whole zip
+                        break
+                    r.raise_for_status()
+
+                    if r.status_code == 206:
+                        # e.g. 'Content-Range: bytes 1000-9999/10000'
+                        expected_bytes = int(r.headers["Content-Range"].split("/")[-1])
+                        mode = "ab"
+                    else:
+                        # The server ignored the Range header, so start again
+                        content_length = r.headers.get("Content-Length")
+                        expected_bytes = int(content_length) if content_length else None
+                        mode = "wb"
+
+                    # Stream to disk in chunks, rather than holding the whole file in memory
+                    with open(part_filename, mode) as part_file:
+                        for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE_BYTES):
+                            if self.bandwidth_limiter is not None:
+                                self.bandwidth_limiter.acquire(len(chunk))
+                            part_file.write(chunk)
+                            n_bytes += len(chunk)
+                break
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.ChunkedEncodingError,
+                requests.exceptions.Timeout,
+            ) as e:
+                if attempt == max_attempts - 1:
+                    raise
+                log.warn(
+                    f"Download of {product_name} interrupted ({e}), resuming from byte "
+                    f"{os.path.getsize(part_filename) if os.path.exists(part_filename) else 0}",
+                    parent="DownloadManager",
+                )
 
-        r = requests.get(data_link, params=params)
-        r.raise_for_status()
+        n_bytes_on_disk = os.path.getsize(part_filename)
+        if expected_bytes is not None and n_bytes_on_disk != expected_bytes:
+            raise IOError(
+                f"Downloaded {n_bytes_on_disk} bytes for {product_name}, "
+                f"expected {expected_bytes} bytes"
+            )
 
-        zipped_files = zipfile.ZipFile(BytesIO(r.content))
-        zipped_files.extractall(f"{self.data_dir}")
+        try:
+            with zipfile.ZipFile(part_filename) as zipped_files:
+                # Only the native file is used downstream, so skip the metadata files.
+                # Other products, like the cloud mask, are extracted in full
+                members = [name for name in zipped_files.namelist() if name.endswith(".nat")]
+                zipped_files.extractall(f"{self.data_dir}", members=members or None)
+        except zipfile.BadZipFile:
+            # Don't resume from a corrupt file next time
+            os.remove(part_filename)
+            raise
+        os.remove(part_filename)
 
-        return
+        return n_bytes
 
     def download_date_range(
         self, start_date: str, end_date: str, product_id="EO:EUM:DAT:MSG:MSG15-RSS"
@@ -332,16 +856,30 @@ class EUMETSATDownloadManager:
             product_id: ID of the EUMETSAT product requested
         """
 
-        datasets = identify_available_datasets(start_date, end_date, product_id=product_id)
+        datasets = self.identify_available_datasets(start_date, end_date, product_id=product_id)
         self.download_datasets(datasets, product_id=product_id)
 
 
-    def download_datasets(self, datasets, product_id="EO:EUM:DAT:MSG:MSG15-RSS"):
+    def download_datasets(
+        self,
+        datasets,
+        product_id="EO:EUM:DAT:MSG:MSG15-RSS",
+        concurrency: int = 1,
+    ) -> list:
         """Downloads a product-id- and date-range-specific dataset from the EUMETSAT API
 
+        Datasets already in the native file store are copied from there in one batch, using
+        an index of the store which is listed once per download manager. The rest are
+        downloaded by a pool of `concurrency` threads. A failure for one dataset is logged and
+        does not stop the others from being downloaded.
+
         Args:
             datasets: list of datasets returned by `identify_available_datasets`
             product_id: ID of the EUMETSAT product requested
+            concurrency: number of datasets to download in parallel, defaults to 1
+
+        Returns:
+            List of the dataset ids which failed to download
         """
 
         # Identifying dataset ids to download
@@ -353,42 +891,133 @@ class EUMETSATDownloadManager:
                 "No files will be downloaded. None were found in API search.",
                 parent="DownloadManager",
             )
-            return
+            return []
 
-        for dataset_id in dataset_ids:
-            log.debug(f"Downloading: {dataset_id}", parent="DownloadManager")
+        start = time.time()
 
-            # get raw files from s3, if there
-            files = utils.move_files(dataset_id=dataset_id,
-                                          data_dir_from=self.native_file_dir,
-                                          data_dir_to=self.data_dir)
-            if len(files) == 0:
+        # get raw files from s3, if there
+        dataset_ids_to_download = self._copy_datasets_from_native_file_store(dataset_ids)
 
-                dataset_link = dataset_id_to_link(
-                    product_id, dataset_id, access_token=self.access_token
-                )
-                # Download the raw data
+        n_bytes = 0
+        failed_dataset_ids = []
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {
+                executor.submit(self._download_dataset, dataset_id, product_id): dataset_id
+                for dataset_id in dataset_ids_to_download
+            }
+
+            for future in as_completed(futures):
+                dataset_id = futures[future]
                 try:
-                    self.download_single_dataset(dataset_link)
-                except HTTPError:
-                    log.debug("The EUMETSAT access token has been refreshed",
-                              parent="DownloadManager")
-                    self.request_access_token()
-                    dataset_link = dataset_id_to_link(
-                        product_id, dataset_id, access_token=self.access_token
-                    )
-                    self.download_single_dataset(dataset_link)
+                    n_bytes += future.result()
                 except Exception as e:
+                    failed_dataset_ids.append(dataset_id)
                     log.error(
                         f"Error downloading dataset with id {dataset_id}: {e}",
                         exc_info=True,
                         parent="DownloadManager",
-                )
+                    )
+
+        duration_seconds = max(time.time() - start, 1e-6)
+        log.info(
+            f"Downloaded {len(dataset_ids) - len(failed_dataset_ids)} of {len(dataset_ids)} "
+            f"datasets ({n_bytes / 1e6:.1f} MB) in {duration_seconds:.1f} seconds, "
+            f"{n_bytes / 1e6 / duration_seconds:.2f} MB/s with {concurrency=}",
+            parent="DownloadManager",
+        )
+
+        return failed_dataset_ids
+
+    def _copy_datasets_from_native_file_store(self, dataset_ids: list) -> list:
+        """Copy the datasets which are already in the native file store to the data directory
+
+        Args:
+            dataset_ids: Dataset IDs to look for
+
+        Returns:
+            List of the dataset ids which still need downloading
+        """
+        if self.native_file_index is None:
+            self.native_file_index = utils.NativeFileIndex(self.native_file_dir)
+
+        stored_files = {
+            dataset_id: self.native_file_index.files(dataset_id) for dataset_id in dataset_ids
+        }
+        files = [file for dataset_files in stored_files.values() for file in dataset_files]
+        if len(files) == 0:
+            return dataset_ids
+
+        try:
+            utils.copy_files(files, data_dir_from=self.native_file_dir, data_dir_to=self.data_dir)
+        except Exception as e:
+            log.error(
+                f"Error copying {len(files)} files from the native file store, "
+                f"so will download them instead: {e}",
+                exc_info=True,
+                parent="DownloadManager",
+            )
+            return dataset_ids
+
+        return [dataset_id for dataset_id in dataset_ids if len(stored_files[dataset_id]) == 0]
+
+    def _download_dataset(self, dataset_id: str, product_id: str) -> int:
+        """Download the raw files for one dataset from the EUMETSAT API
+
+        The files are also saved to the native file store.
+
+        Args:
+            dataset_id: Dataset ID to download
+            product_id: ID of the EUMETSAT product requested
+
+        Returns:
+            Number of bytes downloaded from the EUMETSAT API
+        """
+        log.debug(f"Downloading: {dataset_id}", parent="DownloadManager")
+
+        access_token = self.access_token
+        dataset_link = dataset_id_to_link(product_id, dataset_id, access_token=access_token)
+        # Download the raw data
+        try:
+            n_bytes = self.download_single_dataset(dataset_link)
+        except (HTTPError, requests.exceptions.HTTPError):
+            log.debug("Refreshing the EUMETSAT access token and retrying",
+                      parent="DownloadManager")
+            self.token_cache.invalidate(access_token)
+            dataset_link = dataset_id_to_link(
+                product_id, dataset_id, access_token=self.access_token
+            )
+            n_bytes = self.download_single_dataset(dataset_link)
+
+        # save raw files to s3
+        if self.uploader is not None:
+            self.uploader.submit(dataset_id)
+        else:
+            utils.move_files(dataset_id=dataset_id,
+                             data_dir_from=self.data_dir,
+                             data_dir_to=self.native_file_dir)
 
-                # save raw files to s3
-                utils.move_files(dataset_id=dataset_id,
-                                        data_dir_from=self.data_dir,
-                                        data_dir_to=self.native_file_dir)
+        return n_bytes
+
+    def flush_uploads(self) -> list:
+        """Wait for the background uploads to the native file store to finish
+
+        Returns:
+            List of the dataset ids which failed to upload
+        """
+        if self.uploader is None:
+            return []
+        return self.uploader.join()
+
+    def flush_datatailor_cleanup(self, timeout: float = REAPER_STOP_TIMEOUT_SECONDS) -> bool:
+        """Wait a bounded time for the queued Data Tailor customisations to be deleted
+
+        Args:
+            timeout: Maximum number of seconds to wait
+
+        Returns:
+            Whether all the queued customisations were deleted in time
+        """
+        return self.datatailor_reaper.stop(timeout)
 
     def download_tailored_date_range(
         self,
@@ -413,7 +1042,7 @@ class EUMETSATDownloadManager:
             projection: Projection of the stored data, defaults to 'geographic'
         """
 
-        datasets = identify_available_datasets(start_date, end_date, product_id=product_id)
+        datasets = self.identify_available_datasets(start_date, end_date, product_id=product_id)
         self.download_tailored_datasets(
             datasets, product_id=product_id, file_format=file_format, projection=projection, roi=roi
         )
@@ -436,18 +1065,20 @@ class EUMETSATDownloadManager:
             file_format: File format of the output, defaults to 'geotiff'
             projection: Projection for the output, defaults to native projection of 'geographic'
             attempts: Number of attempts to make (1 attempt + retries)
+
+        Returns:
+            List of the local files the dataset has been saved to
         """
         for attempt in range(attempts):
             log.info(f"Attempt {attempt + 1} of {attempts}", parent="DownloadManager")
             try:
-                self._download_single_tailored_dataset(
+                return self._download_single_tailored_dataset(
                     dataset_id,
                     product_id,
                     roi,
                     file_format,
                     projection,
                 )
-                break  # Break if the download succeeds
             except Exception as e:
                 if attempt < attempts - 1:
                     # Log and retry, possibly refreshing the token
@@ -455,7 +1086,7 @@ class EUMETSATDownloadManager:
                         "Attempting to refresh the EUMETSAT access token and retry download",
                         parent="DownloadManager"
                     )
-                    self.request_access_token()
+                    self.eumdac_token_cache.invalidate()
                 else:
                     # Final attempt failed, raise exception
                     raise Exception(f"Tried {attempts} times to get tailored dataset, "
@@ -469,10 +1100,16 @@ class EUMETSATDownloadManager:
         file_format: str = "hrit",
         projection: str = None,
         concurrency: int = 1,
-    ):
+        on_complete: Callable[[list], None] = None,
+    ) -> list:
         """
         Query the data tailor service and write the requested ROI data to disk
 
+        With `concurrency` set to `DATA_TAILOR_MAX_CONCURRENT_JOBS` the Data Tailor's job slots
+        are kept full, and finished outputs are downloaded while later jobs are still running.
+        A failed dataset does not stop the others, which are still handed to `on_complete`,
+        and the first error is raised once all the datasets have been tried.
+
         Args:
             datasets: Dataset to extract ids from, for which the tailored sets will be downloaded
             product_id: Product ID for the Data Store
@@ -481,6 +1118,11 @@ class EUMETSATDownloadManager:
             projection: Projection of the stored data, defaults to 'geographic'
             concurrency: concurrency for parallel download, defaults to 1. concurrency should not
                 exceed 3 because the data tailor only takes 3 jobs at a time
+            on_complete: Called with the list of local files of each dataset as soon as it
+                has been downloaded, e.g. to start converting it
+
+        Returns:
+            List of the local files the datasets have been saved to
         """
 
         # Identifying dataset ids to download
@@ -492,7 +1134,10 @@ class EUMETSATDownloadManager:
                 "No files will be downloaded. None were found in API search.",
                 parent="DownloadManager",
             )
-            return
+            return []
+
+        filenames = []
+        errors = []
         with ThreadPoolExecutor(max_workers=concurrency) as executor:
             futures = [
                 executor.submit(
@@ -507,13 +1152,27 @@ class EUMETSATDownloadManager:
 
             for future in as_completed(futures):
                 try:
-                    future.result()
+                    dataset_filenames = future.result()
                 except Exception as e:
                     log.error(
                         f"Failed to download dataset after retrying: {e}",
                         parent="DownloadManager"
                     )
-                    raise e
+                    errors.append(e)
+                    continue
+
+                filenames += dataset_filenames
+                if on_complete is not None and len(dataset_filenames) > 0:
+                    on_complete(dataset_filenames)
+
+        if len(errors) > 0:
+            log.error(
+                f"Failed to download {len(errors)} of {len(dataset_ids)} tailored datasets",
+                parent="DownloadManager",
+            )
+            raise errors[0]
+
+        return filenames
 
     def _download_single_tailored_dataset(
         self,
@@ -533,7 +1192,8 @@ class EUMETSATDownloadManager:
             file_format: File format of the output, defaults to 'geotiff'
             projection: Projection for the output, defaults to native projection of 'geographic'
 
-        return string where the dataset has been saved
+        Returns:
+            List of the local files the dataset has been saved to
         """
 
         SEVIRI = "HRSEVIRI"
@@ -552,39 +1212,32 @@ class EUMETSATDownloadManager:
         else:
             raise ValueError(f"Product ID {product_id} not recognized, ending now")
 
+        filenames = []
+        product_id = self.eumdac_datastore.get_product("EO:EUM:DAT:MSG:HRSEVIRI", dataset_id)
         if tailor_id == SEVIRI_HRV:  # Also do HRV
-            credentials = (self.user_key, self.user_secret)
-            token = eumdac.AccessToken(credentials)
-            datastore = eumdac.DataStore(token)
-            product_id = datastore.get_product("EO:EUM:DAT:MSG:HRSEVIRI", dataset_id)
             log.debug(f"Downloading HRV data for {dataset_id=}, {product_id=}")
-            self.create_and_download_datatailor_data(
+            filenames.append(self.create_and_download_datatailor_data(
                 dataset_id=product_id,
                 tailor_id=SEVIRI_HRV,
                 roi=roi,
                 file_format=file_format,
                 projection=projection,
-            )
+            ))
 
-        credentials = (self.user_key, self.user_secret)
-        token = eumdac.AccessToken(credentials)
-        datastore = eumdac.DataStore(token)
-        product_id = datastore.get_product("EO:EUM:DAT:MSG:HRSEVIRI", dataset_id)
         log.debug(f"Downloading data for {dataset_id=}, {product_id=}")
-        self.create_and_download_datatailor_data(
+        filenames.append(self.create_and_download_datatailor_data(
             dataset_id=product_id,
             tailor_id=tailor_id,
             roi=roi,
             file_format=file_format,
             projection=projection,
-        )
+        ))
+
+        return [filename for filename in filenames if filename is not None]
 
     def cleanup_datatailor(self):
         """Remove all Data Tailor runs"""
-        credentials = (self.user_key, self.user_secret)
-        token = eumdac.AccessToken(credentials)
-        datatailor = eumdac.DataTailor(token)
-        for customisation in datatailor.customisations:
+        for customisation in self.eumdac_datatailor.customisations:
             try:
                 if customisation.status in ['INACTIVE']:
                     customisation.kill()
@@ -607,6 +1260,9 @@ class EUMETSATDownloadManager:
     ):
         """
         Create and download a single data tailor call
+
+        Returns:
+            The local file the output has been saved to, or None if the customisation failed
         """
 
         # check data store, if its there use this instead
@@ -623,6 +1279,7 @@ class EUMETSATDownloadManager:
                 parent="DownloadManager",
             )
             fs.get(data_store_filename_remote, data_store_filename_local)
+            return data_store_filename_local
 
         else:
             log.debug(
@@ -639,7 +1296,7 @@ class EUMETSATDownloadManager:
                 compression=compression,
             )
 
-            datatailor = eumdac.DataTailor(eumdac.AccessToken((self.user_key, self.user_secret)))
+            datatailor = self.eumdac_datatailor
 
             # Attempt to create customisation. This is attempted for 5 minutes,
             # as other running customisations can block the creation, hence we
@@ -650,22 +1307,24 @@ class EUMETSATDownloadManager:
             attempt: int = 1
 
             # see all customisations status
-            all_status =  [(c.status, c._id) for c in datatailor.customisations]
+            all_status = [
+                (status, c._id) for c, status in self.datatailor_monitor.customisations()
+            ]
             log.info(f"{all_status=}")
 
             # 5 minute timeout
             while (datetime.datetime.now() - start).seconds < 300:
+                # The listing is shared with the other downloads, rather than each re-listing
+                statuses = self.datatailor_monitor.customisations()
                 running_customisations: list[eumdac.Customisation] = [
-                    c for c in datatailor.customisations
-                    if c.status in ['RUNNING', 'QUEUED', 'INACTIVE', "FAILED"]
+                    c for c, status in statuses
+                    if status in ['RUNNING', 'QUEUED', 'INACTIVE', "FAILED"]
                 ]
                 inactive_customisations: list[eumdac.Customisation] = [
-                    c for c in running_customisations
-                    if c.status in ['INACTIVE']
+                    c for c, status in statuses if status in ['INACTIVE']
                 ]
                 failed_customisations: list[eumdac.Customisation] = [
-                    c for c in running_customisations
-                    if c.status in ['FAILED']
+                    c for c, status in statuses if status in ['FAILED']
                 ]
                 log.debug(
                     f"Attempt {attempt}: Found {len(running_customisations)} "
@@ -674,45 +1333,13 @@ class EUMETSATDownloadManager:
                     f"{len(failed_customisations)} are failed "
                 )
 
-                # Try to kill any inactive customisations
-                killed: int = 0
-                if len(inactive_customisations) > 0:
-                    log.debug(
-                        f"Attempt {attempt}: Clearing {len(inactive_customisations)} "
-                        f"inactive customisations...",
-                        parent="DownloadManager",
-                    )
-                    try:
-                        for i, customisation in enumerate(inactive_customisations):
-                            customisation.kill()
-                            customisation.delete()
-                            killed += 1
-                    except Exception as e:
-                        log.debug(
-                            f"Attempt {attempt}: Error clearing inactive customisation "
-                            f"{i} of {len(inactive_customisations)}: {e}",
-                            parent="DownloadManager",
-                        )
+                # Stuck customisations are killed and deleted in the background, so the
+                # slots they hold are freed without waiting here
+                if len(inactive_customisations) + len(failed_customisations) > 0:
+                    self.datatailor_reaper.wake()
 
-                if len(failed_customisations) > 0:
-                    log.debug(
-                        f"Attempt {attempt}: Clearing {len(failed_customisations)} "
-                        f"failed customisations...",
-                        parent="DownloadManager",
-                    )
-                    try:
-                        for i, customisation in enumerate(failed_customisations):
-                            customisation.delete()
-                            killed += 1
-                    except Exception as e:
-                        log.debug(
-                            f"Attempt {attempt}: Error clearing failed customisation "
-                            f"{i} of {len(inactive_customisations)}: {e}",
-                            parent="DownloadManager",
-                        )
-
-                # If that left enough space for a new customisation, try to make it
-                if len(running_customisations) - killed < 3:
+                # If there is space for a new customisation, try to make it
+                if len(running_customisations) < DATA_TAILOR_MAX_CONCURRENT_JOBS:
                     try:
                         customisation = datatailor.new_customisation(dataset_id, chain=chain)
                         log.debug(f"Attempt {attempt}: Created customisation {customisation}")
@@ -720,6 +1347,7 @@ class EUMETSATDownloadManager:
                     except Exception as e:
                         log.debug(f"Attempt {attempt}: Error creating customisation: {e},  "
                                   f"{dataset_id=}, {chain=}")
+                        time.sleep(self.datatailor_monitor.min_interval)
                 else:
                     log.debug(
                         f"Attempt {attempt}: Too many running customisations. "
@@ -727,44 +1355,29 @@ class EUMETSATDownloadManager:
                         parent="DownloadManager",
                     )
                     time.sleep(10)
+                attempt += 1
 
             if customisation is None:
                 log.error("Failed to create customisation, exiting", parent="DownloadManager")
                 return
 
-            sleep_time = 5  # seconds
             log.debug(f"Customisation: {customisation}", parent="DownloadManager")
-            # Customisation Loop
-            now = datetime.datetime.now(tz=datetime.timezone.utc)
-            start = datetime.datetime.now(tz=datetime.timezone.utc)
-            status = datatailor.get_customisation(customisation._id).status
-            while (status != "DONE") & (
-                now - start < datetime.timedelta(minutes=DATA_TAILOR_TIMEOUT_LIMIT_MINUTES)
-            ):
-
-                log.debug(
-                    f"Checking if the file has been downloaded. Started at {start}. "
-                    f"Time out is {DATA_TAILOR_TIMEOUT_LIMIT_MINUTES} minutes",
-                    parent="DownloadManager",
-                )
-
-                # Get the status of the ongoing customisation
-                status = datatailor.get_customisation(customisation._id).status
-                now = datetime.datetime.now(tz=datetime.timezone.utc)
-                log.info(f"Status of ID {customisation._id} is {status}", parent="DownloadManager")
-
-                if "DONE" == status:
-                    break
-                elif "FAILED" in status:
-                    log.info("FAILED, exiting. Should the whole app fail here? ",
-                             parent="DownloadManager")
-                    break
-
-                elif "ERROR" in status or "KILLED" in status:
-                    log.info("UNSUCCESS, exiting", parent="DownloadManager")
-                    break
+            log.debug(
+                f"Waiting for the customisation to finish. "
+                f"Time out is {DATA_TAILOR_TIMEOUT_LIMIT_MINUTES} minutes",
+                parent="DownloadManager",
+            )
+            # The monitor polls all the customisations in flight together
+            status = self.datatailor_monitor.wait(
+                customisation._id, timeout=DATA_TAILOR_TIMEOUT_LIMIT_MINUTES * 60
+            )
+            log.info(f"Status of ID {customisation._id} is {status}", parent="DownloadManager")
 
-                time.sleep(sleep_time)
+            if status is not None and "FAILED" in status:
+                log.info("FAILED, exiting. Should the whole app fail here? ",
+                         parent="DownloadManager")
+            elif status is not None and ("ERROR" in status or "KILLED" in status):
+                log.info("UNSUCCESS, exiting", parent="DownloadManager")
 
             if status != "DONE":
                 log.info(
@@ -776,7 +1389,7 @@ class EUMETSATDownloadManager:
             else:
                 log.info("Customisation as been made", parent="DownloadManager")
 
-            customisation = datatailor.get_customisation(customisation._id)
+            customisation = self.eumdac_datatailor.get_customisation(customisation._id)
             (out,) = fnmatch.filter(customisation.outputs, "*")
             jobID = customisation._id
             log.info(
@@ -784,31 +1397,28 @@ class EUMETSATDownloadManager:
                 parent="DownloadManager",
             )
 
-            with customisation.stream_output(
-                out,
-            ) as stream, open(os.path.join(self.data_dir, stream.name), mode="wb") as fdst:
+            with customisation.stream_output(out) as stream:
                 filename = os.path.join(self.data_dir, stream.name)
-                shutil.copyfileobj(stream, fdst)
-                log.debug(f"Saved file to {filename}", parent="DownloadManager")
-
-                # save to native file data store
+                # save to 'data_dir' and the native file data store at the same time
                 log.debug(
-                    f"Copying file from {filename} to {data_store_filename_remote}",
+                    f"Streaming output to {filename} and {data_store_filename_remote}",
                     parent="DownloadManager",
                 )
-                fs = fsspec.open(data_store_filename_remote).fs
-                fs.put(filename, data_store_filename_remote)
+                n_bytes = tee_stream(
+                    stream,
+                    local_filename=filename,
+                    remote_filename=data_store_filename_remote,
+                    chunk_size=self.stream_chunk_size,
+                    upload_block_size=self.upload_block_size,
+                )
                 log.debug(
-                    f"Copied file from {filename} to {data_store_filename_remote}",
+                    f"Saved {n_bytes} bytes to {filename} and {data_store_filename_remote}",
                     parent="DownloadManager",
                 )
 
-            try:
-                log.info(
-                    f"Deleting job {jobID} from Data Tailor storage. This can take ~1 minute",
-                    parent="DownloadManager",
-                )
-                customisation.delete()
+            # Deleting can take ~1 minute, so it is done in the background
+            log.info(f"Queued job {jobID} for deletion from Data Tailor storage",
+                     parent="DownloadManager")
+            self.datatailor_reaper.delete(customisation)
 
-            except Exception as e:
-                log.warn(f"Failed deleting customization {jobID}: {e}", exc_info=True)
+            return filename
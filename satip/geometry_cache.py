@@ -0,0 +1,238 @@
+"""Caches of values which only depend on the satellite's area definition.
+
+Every file from the same satellite and scan mode has the same area definition, so values
+computed from its full disk of lons and lats can be computed once and reused. The caches
+are kept in memory, and also on disk if a `cache_dir` is given, or set with the
+`SATIP_GEOMETRY_CACHE_DIR` environment variable, so they survive between runs. Setting
+`SATIP_GEOMETRY_CACHE_MMAP=true` memory-maps the OSGB grids read from disk by default.
+
+Usage example:
+  from satip.geometry_cache import CropSliceCache, OSGBGridCache
+  cache = CropSliceCache("./geometry_cache")
+  slices = cache.get(area, bounds)
+  x_osgb, y_osgb = OSGBGridCache("./geometry_cache", mmap=True).get(area)
+"""
+
+import json
+import os
+import tempfile
+import threading
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+import structlog
+
+log = structlog.stdlib.get_logger()
+
+
+def default_cache_dir() -> Optional[str]:
+    """Get the cache directory set with the `SATIP_GEOMETRY_CACHE_DIR` environment variable"""
+    return os.getenv("SATIP_GEOMETRY_CACHE_DIR")
+
+
+def default_mmap() -> bool:
+    """Whether memory-mapping is turned on with the `SATIP_GEOMETRY_CACHE_MMAP` variable"""
+    return os.getenv("SATIP_GEOMETRY_CACHE_MMAP", "false").lower() in ("1", "true", "yes")
+
+
+def area_hash(area) -> Optional[str]:
+    """
+    Hash an area definition, by its projection, shape and extent
+
+    Args:
+        area: pyresample area definition
+
+    Returns:
+        Hex digest of the hash, or None if the area cannot be hashed cheaply, such as a swath
+    """
+    if not hasattr(area, "area_extent"):
+        return None
+    return area.update_hash().hexdigest()
+
+
+def write_atomically(path: str, write: Callable, mode: str = "w"):
+    """
+    Write a file through a temporary file, so other processes never read a partial file
+
+    Args:
+        path: File to write
+        write: Function writing the contents to an open file
+        mode: Mode to open the file with
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        mode, dir=os.path.dirname(path), suffix=".tmp", delete=False
+    ) as f:
+        write(f)
+    os.replace(f.name, path)
+
+
+class CropSliceCache:
+    """
+    Row and column ranges cropping an area definition to a lon-lat box.
+
+    Keyed by the hash of the area definition and the bounds of the box.
+    """
+
+    def __init__(self, cache_dir: str = None):
+        """Init
+
+        Args:
+            cache_dir: Local directory to also store the ranges in,
+                defaults to `SATIP_GEOMETRY_CACHE_DIR` or only keeping them in memory
+        """
+        self.cache_dir = default_cache_dir() if cache_dir is None else cache_dir
+        self._lock = threading.Lock()
+        self._slices = {}
+
+    def get(self, area, bounds) -> Optional[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """
+        Get the cached ranges for an area and bounds
+
+        Args:
+            area: pyresample area definition
+            bounds: The bounding box: [min_lon, min_lat, max_lon, max_lat]
+
+        Returns:
+            ((i0, i1), (j0, j1)) row and column ranges, or None if they are not cached
+        """
+        key = self._key(area, bounds)
+        if key is None:
+            return None
+
+        with self._lock:
+            if key in self._slices:
+                return self._slices[key]
+
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self._path(key)) as f:
+                (i0, i1), (j0, j1) = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        with self._lock:
+            self._slices[key] = (i0, i1), (j0, j1)
+        return (i0, i1), (j0, j1)
+
+    def put(self, area, bounds, slices: Tuple[Tuple[int, int], Tuple[int, int]]):
+        """
+        Store the ranges for an area and bounds
+
+        Args:
+            area: pyresample area definition
+            bounds: The bounding box: [min_lon, min_lat, max_lon, max_lat]
+            slices: ((i0, i1), (j0, j1)) row and column ranges
+        """
+        key = self._key(area, bounds)
+        if key is None:
+            return
+
+        (i0, i1), (j0, j1) = slices
+        slices = (int(i0), int(i1)), (int(j0), int(j1))
+        with self._lock:
+            self._slices[key] = slices
+
+        if self.cache_dir is None:
+            return
+        path = self._path(key)
+        write_atomically(path, lambda f: json.dump(slices, f))
+        log.debug(f"Cached crop slices {slices} in {path}")
+
+    def _key(self, area, bounds) -> Optional[str]:
+        """Get the key of an area and bounds"""
+        area_key = area_hash(area)
+        if area_key is None:
+            return None
+        bounds_key = "_".join(f"{float(bound):g}" for bound in bounds)
+        return f"{area_key}_{bounds_key}"
+
+    def _path(self, key: str) -> str:
+        """Get the path of the file for a key"""
+        return os.path.join(self.cache_dir, "crop_slices", f"{key}.json")
+
+
+class OSGBGridCache:
+    """
+    OSGB x and y coordinates of every pixel of an area definition, as float32 grids.
+
+    Keyed by the hash of the area definition. On disk the grids are stored as `.npy` files,
+    which can be memory-mapped rather than read into memory.
+    """
+
+    def __init__(self, cache_dir: str = None, mmap: bool = None):
+        """Init
+
+        Args:
+            cache_dir: Local directory to also store the grids in,
+                defaults to `SATIP_GEOMETRY_CACHE_DIR` or only keeping them in memory
+            mmap: Whether to memory-map the grids read from disk, read-only,
+                defaults to `SATIP_GEOMETRY_CACHE_MMAP`
+        """
+        self.cache_dir = default_cache_dir() if cache_dir is None else cache_dir
+        self.mmap = default_mmap() if mmap is None else mmap
+        self._lock = threading.Lock()
+        self._grids = {}
+
+    def get(self, area) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Get the cached grids for an area
+
+        Args:
+            area: pyresample area definition
+
+        Returns:
+            (x_osgb, y_osgb) grids, or None if they are not cached
+        """
+        key = area_hash(area)
+        if key is None:
+            return None
+
+        with self._lock:
+            if key in self._grids:
+                return self._grids[key]
+
+        if self.cache_dir is None:
+            return None
+        try:
+            grids = tuple(
+                np.load(self._path(key, name), mmap_mode="r" if self.mmap else None)
+                for name in ["x", "y"]
+            )
+        except (OSError, ValueError):
+            return None
+
+        with self._lock:
+            self._grids[key] = grids
+        return grids
+
+    def put(self, area, x_osgb: np.ndarray, y_osgb: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Store the grids for an area
+
+        Args:
+            area: pyresample area definition
+            x_osgb: OSGB x coordinate of each pixel
+            y_osgb: OSGB y coordinate of each pixel
+
+        Returns:
+            The grids as float32 arrays
+        """
+        grids = np.asarray(x_osgb, dtype=np.float32), np.asarray(y_osgb, dtype=np.float32)
+        key = area_hash(area)
+        if key is None:
+            return grids
+
+        with self._lock:
+            self._grids[key] = grids
+
+        if self.cache_dir is not None:
+            for name, grid in zip(["x", "y"], grids):
+                write_atomically(self._path(key, name), lambda f: np.save(f, grid), mode="wb")
+            log.debug(f"Cached OSGB grids of shape {grids[0].shape} for area {key}")
+        return grids
+
+    def _path(self, key: str, name: str) -> str:
+        """Get the path of the file for a key and grid name"""
+        return os.path.join(self.cache_dir, "osgb_grids", f"{key}_{name}.npy")
@@ -8,13 +8,24 @@ https://epsg.io/27700.
 
   from satip.geospatial import lat_lon_to_osb
   lat_lon_to_osb(numeric_list_of_latitudes, numeric_list_of_longitudes)
+
+For whole satellite grids, `lat_lon_to_osgb_grid` transforms tiles in parallel threads
+into float32 arrays. Transformers between other coordinate systems are got with
+`get_transformer`, which builds each one lazily and caches it for the calling thread.
 """
 
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from numbers import Number
-from typing import List, Tuple
+from typing import TYPE_CHECKING, List, Tuple
 
 import numpy as np
-import pyproj
+
+if TYPE_CHECKING:
+    import pyproj
 
 # OSGB is also called "OSGB 1936 / British National Grid -- United
 # Kingdom Ordnance Survey".  OSGB is used in many UK electricity
@@ -28,10 +39,25 @@ OSGB = 27700
 WGS84 = 4326
 WGS84_CRS = f"EPSG:{WGS84}"
 
+# UTM zone 44N, the zone covering the middle of India, used for the IODC data.
+# Uses easting and northing coordinates in meters. See https://epsg.io/32644
+UTM_INDIA = 32644
+
+# Geostationary projections of the SEVIRI satellites, by the longitude they are over.
+# 0 deg for the 15 minutely data, 9.5 deg for RSS and 45.5 deg for IODC.
+GEOSTATIONARY_CRS = {
+    "SEVIRI": "+proj=geos +lon_0=0 +h=35785831 +a=6378169 +b=6356583.8 +units=m +no_defs",
+    "RSS": "+proj=geos +lon_0=9.5 +h=35785831 +a=6378169 +b=6356583.8 +units=m +no_defs",
+    "IODC": "+proj=geos +lon_0=45.5 +h=35785831 +a=6378169 +b=6356583.8 +units=m +no_defs",
+}
+
 # Geographic bounds for various regions of interest, in order of min_lon, min_lat, max_lon, max_lat
 # (see https://satpy.readthedocs.io/en/stable/_modules/satpy/scene.html)
 GEOGRAPHIC_BOUNDS = {"UK": (-17, 44, 11, 73), "RSS": (-64, 16, 83, 69), "India": (60, 6, 97, 37)}
 
+# Number of pixels transformed at a time by `lat_lon_to_osgb_grid`
+OSGB_TILE_SIZE = 256 * 1024
+
 
 class Transformers:
     """
@@ -39,15 +65,46 @@ class Transformers:
 
     It's good to make this only once, but need the
     option of updating them, due to out of data grids.
+    Prefer `get_transformer`, which also makes one transformer for each thread.
     """
 
     def __init__(self):
         """Init"""
+        import pyproj
+
         self.lat_lon_to_osgb = pyproj.Transformer.from_crs(crs_from=WGS84, crs_to=OSGB)
 
 
-# make the transformers
-_transformers = Transformers()
+# Transformers built so far, keyed by (crs_from, crs_to), separately for each thread.
+# pyproj transformers should not be shared between threads.
+_thread_transformers = threading.local()
+
+
+def get_transformer(crs_from, crs_to) -> pyproj.Transformer:
+    """
+    Get a transformer from one coordinate system to another, for the calling thread
+
+    The transformer is built on first use in each thread, then reused.
+    Axis orders are those of the coordinate systems, so latitude comes first for WGS84.
+
+    Args:
+        crs_from: Coordinate system to transform from, such as `WGS84` or a value of
+            `GEOSTATIONARY_CRS`, in any form accepted by `pyproj.CRS.from_user_input`
+        crs_to: Coordinate system to transform to, such as `OSGB` or `UTM_INDIA`
+
+    Returns:
+        The transformer
+    """
+    transformers = getattr(_thread_transformers, "transformers", None)
+    if transformers is None:
+        transformers = _thread_transformers.transformers = {}
+
+    key = (crs_from, crs_to)
+    if key not in transformers:
+        import pyproj
+
+        transformers[key] = pyproj.Transformer.from_crs(crs_from=crs_from, crs_to=crs_to)
+    return transformers[key]
 
 
 def lat_lon_to_osgb(lat: List[Number], lon: List[Number]) -> Tuple[np.ndarray, np.ndarray]:
@@ -61,4 +118,113 @@ def lat_lon_to_osgb(lat: List[Number], lon: List[Number]) -> Tuple[np.ndarray, n
     Return: 2-tuple of x (east-west), y (north-south).
 
     """
-    return _transformers.lat_lon_to_osgb.transform(lat, lon)
+    return get_transformer(WGS84, OSGB).transform(lat, lon)
+
+
+def lat_lon_to_utm_india(lat: List[Number], lon: List[Number]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Change lat, lon to UTM zone 44N coordinates, for India
+
+    Args:
+        lat: latitude
+        lon: longitude
+
+    Return: 2-tuple of x (easting), y (northing).
+    """
+    return get_transformer(WGS84, UTM_INDIA).transform(lat, lon)
+
+
+def geostationary_to_lat_lon(
+    x: List[Number], y: List[Number], satellite: str = "RSS"
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Change geostationary x, y to lat, lon
+
+    Args:
+        x: geostationary x coordinate, in meters
+        y: geostationary y coordinate, in meters
+        satellite: Satellite the coordinates are from, a key of `GEOSTATIONARY_CRS`
+
+    Return: 2-tuple of latitude, longitude. Points off the disk are inf.
+    """
+    return get_transformer(GEOSTATIONARY_CRS[satellite], WGS84).transform(x, y)
+
+
+def lat_lon_to_geostationary(
+    lat: List[Number], lon: List[Number], satellite: str = "RSS"
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Change lat, lon to geostationary x, y
+
+    Args:
+        lat: latitude
+        lon: longitude
+        satellite: Satellite to get the coordinates of, a key of `GEOSTATIONARY_CRS`
+
+    Return: 2-tuple of geostationary x, y in meters. Points not visible from it are inf.
+    """
+    return get_transformer(WGS84, GEOSTATIONARY_CRS[satellite]).transform(lat, lon)
+
+
+def lat_lon_to_osgb_grid(
+    lat: np.ndarray,
+    lon: np.ndarray,
+    tile_size: int = OSGB_TILE_SIZE,
+    workers: int = None,
+    fill_value: float = np.inf,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Change a grid of lat, lon to OSGB coordinates, as float32
+
+    The grid is split into tiles of `tile_size` pixels, which are transformed in parallel
+    threads and written straight into the float32 outputs, so only one tile at a time per
+    thread is held in float64. Pixels off the edge of the disk, with non-finite lat or lon,
+    are skipped and set to `fill_value`.
+
+    Args:
+        lat: latitude grid
+        lon: longitude grid, the same shape as `lat`
+        tile_size: Number of pixels transformed at a time
+        workers: Number of threads, defaults to the number of CPUs
+        fill_value: Value of the pixels with a non-finite lat or lon
+
+    Return: 2-tuple of x (east-west), y (north-south) float32 grids.
+    """
+    lat = np.asarray(lat)
+    lon = np.asarray(lon)
+    if lat.shape != lon.shape:
+        raise ValueError(f"lat and lon must be the same shape, not {lat.shape} and {lon.shape}")
+
+    x = np.empty(lat.shape, dtype=np.float32)
+    y = np.empty(lat.shape, dtype=np.float32)
+    lat_flat, lon_flat = lat.reshape(-1), lon.reshape(-1)
+    x_flat, y_flat = x.reshape(-1), y.reshape(-1)
+
+    def transform_tile(start: int):
+        stop = min(start + tile_size, lat_flat.size)
+        lat_tile, lon_tile = lat_flat[start:stop], lon_flat[start:stop]
+        on_disk = np.isfinite(lat_tile) & np.isfinite(lon_tile)
+        x_flat[start:stop] = fill_value
+        y_flat[start:stop] = fill_value
+        if not on_disk.any():
+            return
+
+        transformer = get_transformer(WGS84, OSGB)
+        if on_disk.all():
+            x_flat[start:stop], y_flat[start:stop] = transformer.transform(lat_tile, lon_tile)
+        else:
+            x_tile, y_tile = transformer.transform(lat_tile[on_disk], lon_tile[on_disk])
+            x_flat[start:stop][on_disk] = x_tile
+            y_flat[start:stop][on_disk] = y_tile
+
+    starts = range(0, lat_flat.size, tile_size)
+    workers = os.cpu_count() if workers is None else workers
+    if workers <= 1 or len(starts) <= 1:
+        for start in starts:
+            transform_tile(start)
+    else:
+        # pyproj releases the GIL while transforming, so the tiles run in parallel
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(transform_tile, starts))
+
+    return x, y
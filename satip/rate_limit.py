@@ -0,0 +1,128 @@
+"""Token bucket rate limiting of requests to the EUMETSAT API.
+
+A token bucket fills at a constant `rate` up to `capacity` tokens, and each request or
+downloaded byte takes tokens out of it, waiting for the bucket to refill if it is empty.
+When a `state_file` is given the bucket is stored in that file under a file lock, so every
+process using the same file shares one limit.
+
+Usage example:
+  from satip.rate_limit import TokenBucket
+  requests_limiter = TokenBucket(rate=5, state_file="/tmp/satip_requests.json")
+  requests_limiter.acquire()
+"""
+
+import fcntl
+import json
+import os
+import threading
+import time
+
+import structlog
+from requests.adapters import HTTPAdapter
+
+log = structlog.stdlib.get_logger()
+
+
+class TokenBucket:
+    """Token bucket, optionally shared between processes through a state file."""
+
+    def __init__(self, rate: float, capacity: float = None, state_file: str = None):
+        """Init
+
+        Args:
+            rate: Number of tokens added to the bucket per second
+            capacity: Maximum number of tokens in the bucket, defaults to one second's worth
+            state_file: File to keep the bucket in, to share it between processes.
+                If None, the bucket is only shared between the threads of this process.
+        """
+        self.rate = rate
+        self.capacity = rate if capacity is None else capacity
+        self.state_file = state_file
+
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._timestamp = time.time()
+
+        if self.state_file is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.state_file)), exist_ok=True)
+
+    def acquire(self, amount: float = 1) -> float:
+        """
+        Take tokens out of the bucket, waiting until there are enough
+
+        Amounts larger than the capacity are allowed once the bucket is full, leaving it in
+        debt, so the average rate is still kept.
+
+        Args:
+            amount: Number of tokens to take
+
+        Returns:
+            Number of seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            wait = self._try_acquire(amount)
+            if wait <= 0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    def _try_acquire(self, amount: float) -> float:
+        """Take tokens if there are enough, otherwise return how long to wait for them"""
+        with self._lock:
+            if self.state_file is None:
+                return self._take(amount)
+
+            with open(self.state_file, "a+") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0)
+                    try:
+                        state = json.loads(f.read())
+                        self._tokens, self._timestamp = state["tokens"], state["timestamp"]
+                    except (ValueError, KeyError):
+                        # New or corrupt state file, so start with a full bucket
+                        self._tokens, self._timestamp = self.capacity, time.time()
+
+                    wait = self._take(amount)
+
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps({"tokens": self._tokens, "timestamp": self._timestamp}))
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+            return wait
+
+    def _take(self, amount: float) -> float:
+        """Refill the bucket, then take tokens out of it or return how long to wait"""
+        now = time.time()
+        self._tokens = min(self.capacity, self._tokens + (now - self._timestamp) * self.rate)
+        self._timestamp = now
+
+        needed = min(amount, self.capacity)
+        if self._tokens >= needed:
+            self._tokens -= amount
+            return 0.0
+        return (needed - self._tokens) / self.rate
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTP adapter which takes a token from a bucket before sending each request."""
+
+    def __init__(self, request_limiter: TokenBucket, *args, **kwargs):
+        """Init
+
+        Args:
+            request_limiter: Token bucket limiting the number of requests per second
+            *args: Arguments for `HTTPAdapter`
+            **kwargs: Keyword arguments for `HTTPAdapter`
+        """
+        self.request_limiter = request_limiter
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, *args, **kwargs):
+        """Wait for the rate limit, then send the request"""
+        waited = self.request_limiter.acquire()
+        if waited > 0:
+            log.debug(f"Waited {waited:.2f} seconds for the request rate limit")
+        return super().send(request, *args, **kwargs)
@@ -109,7 +109,7 @@ class ScaleToZeroToOne:
         """
         Rescale Xarray DataArray so all values lie in the range [0, 1].
 
-        Warning: The original `dataarray` will be modified in-place.
+        The rescaling is done in one pass into a float32 array, see `rescale_to_range`.
 
         Args:
             dataarray: DataArray to rescale.
@@ -124,15 +124,9 @@ class ScaleToZeroToOne:
                 getattr(self, attr) is not None
             ), f"{attr} must be set in initialisation or through `fit`"
 
-        dataarray = dataarray.reindex({"variable": self.variable_order}).transpose(
-            "time", "y_geostationary", "x_geostationary", "variable"
+        dataarray = rescale_to_range(
+            dataarray, mins=self.mins, maxs=self.maxs, variable_order=self.variable_order
         )
-
-        range = self.maxs - self.mins
-        dataarray -= self.mins
-        dataarray /= range
-        dataarray = dataarray.clip(min=0, max=1)
-        dataarray = dataarray.astype(np.float32)
         dataarray.attrs = serialize_attrs(dataarray.attrs)  # Must be serializable
         return dataarray
 
@@ -142,6 +136,86 @@ class ScaleToZeroToOne:
         return compress_mask(dataarray)
 
 
+def rescale_to_range(
+    dataarray: xr.DataArray, mins, maxs, variable_order: Iterable, upper_bound: float = 1.0
+) -> xr.DataArray:
+    """
+    Rescale each channel linearly from [min, max] to [0, upper_bound], clipping outliers.
+
+    The offset and range of each channel are calculated once, then applied to the data in a
+    single pass, writing straight into one float32 output. Dask arrays are rescaled block by
+    block as they are computed, so they stay lazy.
+
+    Args:
+        dataarray: DataArray to rescale, with dims
+            ('time', 'x_geostationary', 'y_geostationary', 'variable')
+        mins: Min value of each channel, in the order of `variable_order`
+        maxs: Max value of each channel, in the order of `variable_order`
+        variable_order: Order of the channels in the returned DataArray
+        upper_bound: Value the max of each channel is scaled to
+
+    Returns:
+        The rescaled float32 DataArray, with dims ordered
+        ('time', 'y_geostationary', 'x_geostationary', 'variable'). NaNs are kept.
+    """
+    dataarray = dataarray.reindex({"variable": variable_order}).transpose(
+        "time", "y_geostationary", "x_geostationary", "variable"
+    )
+
+    offset = _per_channel(mins)
+    data_range = _per_channel(maxs) - offset
+
+    data = dataarray.data
+    if hasattr(data, "map_blocks"):
+        # Keep all the channels in each block, so every block uses the whole offset and range
+        rescaled = data.rechunk({3: -1}).map_blocks(
+            rescale_block,
+            offset=offset,
+            data_range=data_range,
+            upper_bound=upper_bound,
+            dtype=np.float32,
+        )
+    else:
+        rescaled = rescale_block(np.asarray(data), offset, data_range, upper_bound)
+
+    return dataarray.copy(deep=False, data=rescaled)
+
+
+def rescale_block(
+    data: np.ndarray, offset: np.ndarray, data_range: np.ndarray, upper_bound: float
+) -> np.ndarray:
+    """
+    Rescale an array as clip((data - offset) / data_range * upper_bound, 0, upper_bound)
+
+    The output is float32. The arithmetic is done in float64, one row at a time, so the
+    only full size array made is the output.
+
+    Args:
+        data: Array with the channels along the last axis
+        offset: Offset of each channel
+        data_range: Range of each channel
+        upper_bound: Max value of the output
+
+    Returns:
+        The rescaled float32 array
+    """
+    out = np.empty(data.shape, dtype=np.float32)
+    for index in np.ndindex(data.shape[:-2]):
+        row = np.subtract(data[index], offset, dtype=np.float64)
+        np.divide(row, data_range, out=row)
+        if upper_bound != 1:
+            np.multiply(row, upper_bound, out=row)
+        np.clip(row, 0, upper_bound, out=out[index], casting="unsafe")
+    return out
+
+
+def _per_channel(values) -> np.ndarray:
+    """Get per channel values, such as from `fit`, as a float64 numpy array"""
+    if isinstance(values, xr.DataArray):
+        values = values.values
+    return np.asarray(values, dtype=np.float64)
+
+
 def compress_mask(dataarray: xr.DataArray) -> xr.DataArray:
     """
     Compresses Cloud masks DataArrays.
@@ -0,0 +1,177 @@
+"""On-disk cache of EUMETSAT search results.
+
+Searches are split into fixed time buckets. Once a bucket closed long enough ago that no more
+products will be published for it, its search results are stored on disk. Repeated searches
+over overlapping windows then only query the API for the open-ended tail of the window.
+Empty results are never stored, as after an outage EUMETSAT can publish products hours late.
+
+Usage example:
+  from satip.search_cache import SearchResultCache
+  cache = SearchResultCache("./search_cache")
+  datasets = cache.get(product_id, bucket_start)
+"""
+
+import json
+import os
+import tempfile
+import time
+from typing import List, Optional
+
+import pandas as pd
+import structlog
+
+log = structlog.stdlib.get_logger()
+
+# How long after a bucket ends before its search results are cached. This is well beyond the
+# usual publication delay, so products published late after an outage are still found.
+DEFAULT_CLOSED_AFTER = "6h"
+
+
+def to_utc(timestamp) -> pd.Timestamp:
+    """Convert a date to a UTC pandas Timestamp, assuming naive dates are already in UTC"""
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is None:
+        return timestamp.tz_localize("UTC")
+    return timestamp.tz_convert("UTC")
+
+
+def datasets_in_range(datasets: List[dict], start, end) -> List[dict]:
+    """
+    Filter datasets to those whose sensing time overlaps a date-range
+
+    Args:
+        datasets: Datasets returned by the EUMETSAT search API
+        start: Start of the date-range
+        end: End of the date-range
+
+    Returns:
+        The datasets which overlap the date-range
+    """
+    start = to_utc(start)
+    end = to_utc(end)
+
+    filtered_datasets = []
+    for dataset in datasets:
+        dataset_start, dataset_end = dataset["properties"]["date"].split("/")
+        if to_utc(dataset_start) <= end and to_utc(dataset_end) >= start:
+            filtered_datasets.append(dataset)
+    return filtered_datasets
+
+
+class SearchResultCache:
+    """
+    Search results stored on disk, keyed by product id and time bucket.
+
+    Only closed buckets, which ended at least `closed_after` ago, and which have at least one
+    dataset, are stored. Entries
+    are evicted once they are older than `ttl`, or when there are more than `max_entries`.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        bucket: str = "15min",
+        closed_after: str = DEFAULT_CLOSED_AFTER,
+        ttl: str = "1D",
+        max_entries: int = 10_000,
+    ):
+        """Init
+
+        Args:
+            cache_dir: Local directory to store the search results in
+            bucket: Length of each time bucket
+            closed_after: How long after a bucket ends before its results are cached
+            ttl: How long cached results are kept for
+            max_entries: Maximum number of buckets kept in the cache
+        """
+        self.cache_dir = cache_dir
+        self.bucket = pd.Timedelta(bucket)
+        self.closed_after = pd.Timedelta(closed_after)
+        self.ttl = pd.Timedelta(ttl)
+        self.max_entries = max_entries
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def buckets(self, start, end) -> List[pd.Timestamp]:
+        """Get the start times of the buckets covering a date-range"""
+        first_bucket = to_utc(start).floor(self.bucket)
+        return list(pd.date_range(first_bucket, to_utc(end), freq=self.bucket))
+
+    def is_closed(self, bucket_start: pd.Timestamp, now: Optional[pd.Timestamp] = None) -> bool:
+        """Whether all the products for a bucket have been published, so it can be cached"""
+        now = pd.Timestamp.now(tz="UTC") if now is None else to_utc(now)
+        return bucket_start + self.bucket + self.closed_after <= now
+
+    def get(self, product_id: str, bucket_start: pd.Timestamp) -> Optional[List[dict]]:
+        """
+        Get the cached search results for a bucket
+
+        Args:
+            product_id: ID of the EUMETSAT product
+            bucket_start: Start time of the bucket
+
+        Returns:
+            The cached datasets, or None if the bucket is not cached or has expired
+        """
+        path = self._path(product_id, bucket_start)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl.total_seconds():
+                return None
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, product_id: str, bucket_start: pd.Timestamp, datasets: List[dict]):
+        """
+        Store the search results for a bucket, unless there are none
+
+        Args:
+            product_id: ID of the EUMETSAT product
+            bucket_start: Start time of the bucket
+            datasets: Datasets found in the bucket
+        """
+        if len(datasets) == 0:
+            # The products may just not be published yet, so search for them again next time
+            return
+
+        path = self._path(product_id, bucket_start)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temporary file first, so other processes never read a partial file
+        with tempfile.NamedTemporaryFile(
+            "w", dir=os.path.dirname(path), suffix=".tmp", delete=False
+        ) as f:
+            json.dump(datasets, f)
+        os.replace(f.name, path)
+
+    def evict(self):
+        """Remove expired entries, then the oldest ones if there are more than `max_entries`"""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for file in files:
+                if file.endswith(".json"):
+                    path = os.path.join(root, file)
+                    entries.append((os.path.getmtime(path), path))
+        entries.sort(reverse=True)
+
+        n_evicted = 0
+        for i, (modified, path) in enumerate(entries):
+            if i >= self.max_entries or time.time() - modified > self.ttl.total_seconds():
+                try:
+                    os.remove(path)
+                    n_evicted += 1
+                except OSError:
+                    # Another process may have evicted it already
+                    pass
+
+        if n_evicted > 0:
+            log.debug(f"Evicted {n_evicted} search results from {self.cache_dir}")
+
+    def _path(self, product_id: str, bucket_start: pd.Timestamp) -> str:
+        """Get the path of the file for a product and bucket"""
+        product_dir = product_id.replace(":", "_")
+        bucket_dir = f"{int(self.bucket.total_seconds())}s"
+        return os.path.join(
+            self.cache_dir, product_dir, bucket_dir, f"{bucket_start.strftime('%Y%m%d%H%M')}.json"
+        )
@@ -9,9 +9,9 @@ Usage example:
 """
 
 import datetime
+import sys
 
 import numpy as np
-import pyresample
 import yaml
 
 
@@ -41,8 +41,9 @@ def serialize_attrs(attrs: dict) -> dict:
         if isinstance(value, (bool, np.bool_)):
             attrs[key] = str(value)
 
-        # Convert area
-        if isinstance(value, pyresample.geometry.AreaDefinition):
+        # Convert area. If pyresample has not been imported, there are no areas to convert
+        geometry = sys.modules.get("pyresample.geometry")
+        if geometry is not None and isinstance(value, geometry.AreaDefinition):
             attrs[key] = value.dump()
 
         if isinstance(value, datetime.datetime):
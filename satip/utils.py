@@ -6,31 +6,34 @@ Collection of helper functions and utilities around
 - data sanitation
 - setting up a logger
 - datetime string formatting
+
+Heavy dependencies, such as satpy, zarr, ocf_blosc2 and psutil, are imported inside the
+functions which need them, so the download and cleanup paths start quickly.
 """
 
+from __future__ import annotations
+
+import bisect
 import datetime
+import functools
 import gc
-import glob
+import multiprocessing
 import os
 import secrets
 import shutil
 import subprocess
 import tempfile
 import warnings
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from pathlib import Path
-from typing import Any, Tuple
+from typing import TYPE_CHECKING, Any, Tuple
 from zipfile import ZipFile
 
 import fsspec
-import numcodecs
 import numpy as np
 import pandas as pd
-import psutil
 import structlog
 import xarray as xr
-import zarr
-from ocf_blosc2 import Blosc2
-from satpy import Scene
 
 from satip.constants import (
     ALL_BANDS,
@@ -41,11 +44,21 @@ from satip.constants import (
     SCALER_MINS,
 )
 from satip.filenames import get_datetime_from_filename
-from satip.geospatial import GEOGRAPHIC_BOUNDS, lat_lon_to_osgb
-from satip.scale_to_zero_to_one import ScaleToZeroToOne, compress_mask
+from satip.geometry_cache import CropSliceCache, OSGBGridCache
+from satip.geospatial import GEOGRAPHIC_BOUNDS, lat_lon_to_osgb_grid
+from satip.scale_to_zero_to_one import ScaleToZeroToOne, compress_mask, rescale_to_range
 from satip.serialize import serialize_attrs
 
+if TYPE_CHECKING:
+    from satpy import Scene
+
 LATEST_DIR_NAME = "latest"
+CROP_SLICE_CACHE = CropSliceCache()
+OSGB_GRID_CACHE = OSGBGridCache()
+
+# Chunks of the saved zarr files, also used to chunk the data straight after loading it
+HRV_CHUNKS = {"time": 1, "y_geostationary": 512, "x_geostationary": 512, "variable": 1}
+NON_HRV_CHUNKS = {"time": 1, "y_geostationary": 256, "x_geostationary": 256, "variable": 1}
 log = structlog.get_logger()
 
 warnings.filterwarnings("ignore", message="divide by zero encountered in true_divide")
@@ -169,14 +182,7 @@ def load_native_to_dataarray(
     else:
         decompressed_filename = str(filename)
         decompressed_file = False
-    scene = Scene(filenames={"seviri_l1b_native": [decompressed_filename]})
-    hrv_scene = Scene(filenames={"seviri_l1b_native": [decompressed_filename]})
-    hrv_scene.load(
-        [
-            "HRV",
-        ]
-    )
-    scene.load(NON_HRV_BANDS)
+    hrv_scene, scene = load_hrv_and_nonhrv_scenes(decompressed_filename, generate=True)
     # HRV covers a smaller portion of the disk than other bands, so use that as the bounds
     # Selected bounds empirically for have no NaN values from off disk image,
     # and are covering the UK + a bit
@@ -216,6 +222,8 @@ def load_cloudmask_to_dataarray(
     Returns:
         Returns Xarray DataArray if script worked, else returns None
     """
+    from satpy import Scene
+
     scene = Scene(filenames={"seviri_l2_grib": [filename]})
     scene.load(
         [
@@ -275,12 +283,18 @@ def convert_scene_to_dataarray(
 
     # Lat and Lon are the same for all the channels now
     if calculate_osgb:
-        lon, lat = scene[band].attrs["area"].get_lonlats()
-        osgb_x, osgb_y = lat_lon_to_osgb(lat, lon)
+        # The grids only depend on the area, so are only calculated once for each area
+        area_def = scene[band].attrs["area"]
+        osgb_grids = OSGB_GRID_CACHE.get(area_def)
+        if osgb_grids is None:
+            lon, lat = area_def.get_lonlats()
+            osgb_x, osgb_y = lat_lon_to_osgb_grid(lat, lon)
+            osgb_grids = OSGB_GRID_CACHE.put(area_def, osgb_x, osgb_y)
+        osgb_x, osgb_y = osgb_grids
         # Assign x_osgb and y_osgb and set some attributes
         dataarray = dataarray.assign_coords(
-            x_osgb=(("y", "x"), np.float32(osgb_x)),
-            y_osgb=(("y", "x"), np.float32(osgb_y)),
+            x_osgb=(("y", "x"), osgb_x),
+            y_osgb=(("y", "x"), osgb_y),
         )
         for name in ["x_osgb", "y_osgb"]:
             dataarray[name].attrs = {
@@ -326,100 +340,142 @@ def do_v15_rescaling(
     Returns:
         Xarray DataArray
     """
-    dataarray = dataarray.reindex({"variable": variable_order}).transpose(
-        "time", "y_geostationary", "x_geostationary", "variable"
-    )
     upper_bound = (2 ** 10) - 1
-    new_max = maxs - mins
-
-    dataarray -= mins
-    dataarray /= new_max
-    dataarray *= upper_bound
-    dataarray = dataarray.clip(min=0, max=upper_bound).astype(np.float32)
-    return dataarray
+    return rescale_to_range(
+        dataarray, mins=mins, maxs=maxs, variable_order=variable_order, upper_bound=upper_bound
+    )
 
 
 def get_dataset_from_scene(
-    filename: str, hrv_scaler, use_rescaler: bool, save_dir, use_hr_serviri, use_iodc=False
+    filename: str,
+    hrv_scaler,
+    use_rescaler: bool,
+    save_dir,
+    use_hr_serviri,
+    use_iodc=False,
+    scene: Scene = None,
+    lazy: bool = False,
 ):
     """
     Returns the Xarray dataset from the filename
-    """
-    if ".nat" in filename:
-        log.debug(f"Loading Native {filename}", memory=get_memory())
-        hrv_scene = load_native_from_zip(filename)
-    else:
-        log.debug(f"Loading HRIT {filename}", memory=get_memory())
-        hrv_scene = load_hrit_from_zip(filename, sections=list(range(16, 25)))
-    hrv_scene.load(
-        [
-            "HRV",
-        ],
-        generate=False,
-    )
 
-    if not use_iodc:
-        log.debug("Loaded HRV", memory=get_memory())
-        hrv_dataarray: xr.DataArray = convert_scene_to_dataarray(
-            hrv_scene, band="HRV", area="UK", calculate_osgb=True
-        )
-    else:
-        hrv_dataarray: xr.DataArray = convert_scene_to_dataarray(
-            hrv_scene, band="HRV", area="India", calculate_osgb=False
-        )
-    log.debug("Converted HRV to dataarray", memory=get_memory())
-    del hrv_scene
-    attrs = serialize_attrs(hrv_dataarray.attrs)
+    If `scene` is given, its already loaded HRV band is used instead of opening the file again.
+    If `lazy`, satpy's dask arrays are chunked straight after cropping, so rescaling, the
+    quality filter and the zarr write all work one chunk at a time.
+    """
+    # HRIT files are read lazily, so keep them until the data has been saved
+    with tempfile.TemporaryDirectory(prefix="satip_hrit_") as hrit_dir:
+        if scene is not None:
+            hrv_scene = scene
+        else:
+            if ".nat" in filename:
+                log.debug(f"Loading Native {filename}", memory=get_memory())
+                hrv_scene = load_native_from_zip(filename)
+            else:
+                log.debug(f"Loading HRIT {filename}", memory=get_memory())
+                hrv_scene = load_hrit_from_zip(
+                    filename, sections=list(range(16, 25)), extract_dir=hrit_dir
+                )
+            hrv_scene.load(
+                [
+                    "HRV",
+                ],
+                generate=False,
+            )
+        del scene
 
-    if not use_iodc:
-        if use_rescaler:
-            hrv_dataarray = hrv_scaler.rescale(hrv_dataarray)
+        if not use_iodc:
+            log.debug("Loaded HRV", memory=get_memory())
+            hrv_dataarray: xr.DataArray = convert_scene_to_dataarray(
+                hrv_scene, band="HRV", area="UK", calculate_osgb=True
+            )
         else:
-            hrv_dataarray = do_v15_rescaling(
-                hrv_dataarray,
-                variable_order=["HRV"],
-                maxs=HRV_SCALER_MAX,
-                mins=HRV_SCALER_MIN,
+            hrv_dataarray: xr.DataArray = convert_scene_to_dataarray(
+                hrv_scene, band="HRV", area="India", calculate_osgb=False
             )
-    hrv_dataarray = hrv_dataarray.transpose(
-        "time", "y_geostationary", "x_geostationary", "variable"
-    )
-    log.info("Rescaled HRV", memory=get_memory())
-    hrv_dataarray = hrv_dataarray.chunk((1, 512, 512, 1))
-    hrv_dataset = hrv_dataarray.to_dataset(name="data")
-    hrv_dataset.attrs.update(attrs)
-    log.debug("Converted HRV to DataArray", memory=get_memory())
-    now_time = pd.Timestamp(hrv_dataset["time"].values[0]).strftime("%Y%m%d%H%M")
-
-    # Check for data quality
-    if not data_quality_filter(hrv_dataset):
+        log.debug("Converted HRV to dataarray", memory=get_memory())
+        if lazy:
+            hrv_dataarray = hrv_dataarray.chunk(HRV_CHUNKS)
+        del hrv_scene
+        attrs = serialize_attrs(hrv_dataarray.attrs)
+
+        if not use_iodc:
+            if use_rescaler:
+                hrv_dataarray = hrv_scaler.rescale(hrv_dataarray)
+            else:
+                hrv_dataarray = do_v15_rescaling(
+                    hrv_dataarray,
+                    variable_order=["HRV"],
+                    maxs=HRV_SCALER_MAX,
+                    mins=HRV_SCALER_MIN,
+                )
+        hrv_dataarray = hrv_dataarray.transpose(
+            "time", "y_geostationary", "x_geostationary", "variable"
+        )
+        log.info("Rescaled HRV", memory=get_memory())
+        hrv_dataarray = hrv_dataarray.chunk((1, 512, 512, 1))
+        hrv_dataset = hrv_dataarray.to_dataset(name="data")
+        hrv_dataset.attrs.update(attrs)
+        log.debug("Converted HRV to DataArray", memory=get_memory())
+        now_time = pd.Timestamp(hrv_dataset["time"].values[0]).strftime("%Y%m%d%H%M")
+
+        # Check for data quality. When lazy, this is done while saving, so the data is only
+        # read, cropped and rescaled once
+        if not lazy and not data_quality_filter(hrv_dataset):
+            del hrv_dataset
+            gc.collect()
+            return
+
+        filename = f"hrv_{now_time}.zarr.zip"
+        if use_hr_serviri:
+            filename = f"15_{filename}"
+        if use_iodc:
+            filename = f"iodc_{now_time}.zarr.zip"
+
+        save_file = os.path.join(save_dir, filename)
+        log.debug(f"Saving HRV netcdf in {save_file}", memory=get_memory())
+        save_to_zarr_to_backend(hrv_dataset, save_file, check_quality=lazy)
         del hrv_dataset
         gc.collect()
-        return
+        log.debug("Saved HRV to NetCDF", memory=get_memory())
 
-    filename = f"hrv_{now_time}.zarr.zip"
-    if use_hr_serviri:
-        filename = f"15_{filename}"
-    if use_iodc:
-        filename = f"iodc_{now_time}.zarr.zip"
-
-    save_file = os.path.join(save_dir, filename)
-    log.debug(f"Saving HRV netcdf in {save_file}", memory=get_memory())
-    save_to_zarr_to_backend(hrv_dataset, save_file)
-    del hrv_dataset
-    gc.collect()
-    log.debug("Saved HRV to NetCDF", memory=get_memory())
-
-def crop(scene: Scene, bounds: list[float]) -> Scene:
+def crop(scene: Scene, bounds: list[float], cache: CropSliceCache = None) -> Scene:
     """Crop the satpy scene to given lon-lat box
 
+    The rows and columns to keep are cached for each area definition and bounds, so only the
+    first file from a satellite has to compute the lons and lats of its whole disk.
+
     Args:
         scene: The satpy Scene object
         bounds: The bounding box: [min_lon, min_lat, max_lon, max_lat]
+        cache: Cache of the crop slices, defaults to one shared by all calls
+    """
+    cache = CROP_SLICE_CACHE if cache is None else cache
+    area = scene[list(scene.keys())[0]].attrs["area"]
+
+    slices = cache.get(area, bounds)
+    if slices is None:
+        slices = get_crop_slices(area, bounds)
+        cache.put(area, bounds, slices)
+    (i0, i1), (j0, j1) = slices
+
+    # return and slice the scene
+    return scene.slice(((slice(i0, i1), slice(j0, j1))))
+
+
+def get_crop_slices(area, bounds: list[float]) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    """Get the rows and columns of an area definition which cover a lon-lat box
+
+    Args:
+        area: The area definition to crop
+        bounds: The bounding box: [min_lon, min_lat, max_lon, max_lat]
+
+    Returns:
+        ((i0, i1), (j0, j1)) row and column ranges to keep
     """
 
-    # Get the lons and lats of the first channel - these are 2D arrays
-    lons, lats = scene[list(scene.keys())[0]].attrs["area"].get_lonlats()
+    # Get the lons and lats of the area - these are 2D arrays
+    lons, lats = area.get_lonlats()
 
     # Make mask of the lasts and lons
     min_lon, min_lat, max_lon, max_lat = bounds
@@ -438,27 +494,51 @@ def crop(scene: Scene, bounds: list[float]) -> Scene:
     j0 = mask_j.argmax()
     j1 = len(mask_j) - mask_j[::-1].argmax()
 
-    # return and slice the scene
-    return scene.slice(((slice(i0, i1), slice(j0, j1))))
+    return (int(i0), int(i1)), (int(j0), int(j1))
+
+
+def zero_fractions(ds: xr.Dataset) -> dict:
+    """
+    Get the fraction of zeros in each data variable
+
+    For dask arrays the fractions are lazy, so they can be computed in the same pass over the
+    data as writing it, and are reduced chunk by chunk rather than loading the whole array.
+
+    Args:
+        ds: Dataset to check
+
+    Returns:
+        Dictionary of each data variable to its fraction of zeros
+    """
+    return {var: np.isclose(ds[var].data, 0.0).mean() for var in ds.data_vars}
 
 
-def data_quality_filter(ds: xr.Dataset, threshold_fraction: float = 0.9) -> bool:
+def data_quality_filter(
+    ds: xr.Dataset, threshold_fraction: float = 0.9, fractions: dict = None
+) -> bool:
     """
     Filter out datasets with a high fraction of zeros
 
     Args:
         ds: Dataset to check
         threshold_fraction: Fraction of 0's where the data quality is too low, so fail the check
+        fractions: Fractions of zeros already computed with `zero_fractions`, if None they are
+            computed here, which computes the whole graph of a lazy dataset
 
     Returns:
         False, if the data contains too many zeros
         True, if not
     """
-    for var in ds.data_vars:
-        fraction_of_zeros = np.isclose(ds[var], 0.0).mean()
+    import dask
+
+    if fractions is None:
+        (fractions,) = dask.compute(zero_fractions(ds))
+
+    for var, fraction_of_zeros in fractions.items():
+        fraction_of_zeros = float(fraction_of_zeros)
         if fraction_of_zeros > threshold_fraction:
             log.debug(
-                f"Ignoring dataset {ds} as {var} has {fraction_of_zeros} fraction of zeros"
+                f"Ignoring dataset {ds} as {var} has {fraction_of_zeros:.3f} fraction of zeros"
                 f" (threshold {threshold_fraction})"
             )
             return False
@@ -466,96 +546,155 @@ def data_quality_filter(ds: xr.Dataset, threshold_fraction: float = 0.9) -> bool
 
 
 def get_nonhrv_dataset_from_scene(
-    filename: str, scaler, use_rescaler: bool, save_dir, use_hr_serviri, use_iodc:bool=False
+    filename: str,
+    scaler,
+    use_rescaler: bool,
+    save_dir,
+    use_hr_serviri,
+    use_iodc: bool = False,
+    scene: Scene = None,
+    lazy: bool = False,
 ):
     """
     Returns the Xarray dataset from the filename
-    """
-    if ".nat" in filename:
-        scene = load_native_from_zip(filename)
-    else:
-        scene = load_hrit_from_zip(filename, sections=list(range(6, 9)))
-    scene.load(
-        NON_HRV_BANDS,
-        generate=False,
-    )
 
-    log.debug(f"Loaded non-hrv file: {filename}", memory=get_memory())
-    if not use_iodc:
-        # Note band isn't really used, but its just needs to be a valid band
-        dataarray: xr.DataArray = convert_scene_to_dataarray(
-            scene, band="IR_016", area="UK", calculate_osgb=True
-        )
-    else:
-        dataarray: xr.DataArray = convert_scene_to_dataarray(
-            scene, band="IR_016", area="India", calculate_osgb=False
-        )
+    If `scene` is given, its already loaded non-HRV bands are used instead of opening the file.
+    If `lazy`, satpy's dask arrays are chunked straight after cropping, so rescaling, the
+    quality filter and the zarr write all work one chunk at a time.
+    """
+    # HRIT files are read lazily, so keep them until the data has been saved
+    with tempfile.TemporaryDirectory(prefix="satip_hrit_") as hrit_dir:
+        if scene is None:
+            if ".nat" in filename:
+                scene = load_native_from_zip(filename)
+            else:
+                scene = load_hrit_from_zip(
+                    filename, sections=list(range(6, 9)), extract_dir=hrit_dir
+                )
+            scene.load(
+                NON_HRV_BANDS,
+                generate=False,
+            )
 
-    log.debug(f"Converted non-HRV file {filename} to dataarray", memory=get_memory())
-    del scene
-    attrs = serialize_attrs(dataarray.attrs)
-    if not use_iodc:
-        if use_rescaler:
-            dataarray = scaler.rescale(dataarray)
+        log.debug(f"Loaded non-hrv file: {filename}", memory=get_memory())
+        if not use_iodc:
+            # Note band isn't really used, but its just needs to be a valid band
+            dataarray: xr.DataArray = convert_scene_to_dataarray(
+                scene, band="IR_016", area="UK", calculate_osgb=True
+            )
         else:
-            dataarray = do_v15_rescaling(
-                dataarray,
-                mins=SCALER_MINS,
-                maxs=SCALER_MAXS,
-                variable_order=NON_HRV_BANDS,
-        )
-    dataarray = dataarray.transpose("time", "y_geostationary", "x_geostationary", "variable")
-    dataarray = dataarray.chunk((1, 256, 256, 1))
-    dataset = dataarray.to_dataset(name="data")
-    log.debug("Converted non-HRV to dataset", memory=get_memory())
-    del dataarray
-    dataset.attrs.update(attrs)
-    log.debug("Deleted return list", memory=get_memory())
-    now_time = pd.Timestamp(dataset["time"].values[0]).strftime("%Y%m%d%H%M")
+            dataarray: xr.DataArray = convert_scene_to_dataarray(
+                scene, band="IR_016", area="India", calculate_osgb=False
+            )
 
-    if not data_quality_filter(dataset):
+        log.debug(f"Converted non-HRV file {filename} to dataarray", memory=get_memory())
+        if lazy:
+            dataarray = dataarray.chunk(NON_HRV_CHUNKS)
+        del scene
+        attrs = serialize_attrs(dataarray.attrs)
+        if not use_iodc:
+            if use_rescaler:
+                dataarray = scaler.rescale(dataarray)
+            else:
+                dataarray = do_v15_rescaling(
+                    dataarray,
+                    mins=SCALER_MINS,
+                    maxs=SCALER_MAXS,
+                    variable_order=NON_HRV_BANDS,
+            )
+        dataarray = dataarray.transpose("time", "y_geostationary", "x_geostationary", "variable")
+        dataarray = dataarray.chunk((1, 256, 256, 1))
+        dataset = dataarray.to_dataset(name="data")
+        log.debug("Converted non-HRV to dataset", memory=get_memory())
+        del dataarray
+        dataset.attrs.update(attrs)
+        log.debug("Deleted return list", memory=get_memory())
+        now_time = pd.Timestamp(dataset["time"].values[0]).strftime("%Y%m%d%H%M")
+
+        # When lazy, the data quality is checked while saving, so the data is only computed once
+        if not lazy and not data_quality_filter(dataset):
+            del dataset
+            gc.collect()
+            return
+
+        filename = f"{now_time}.zarr.zip"
+        if use_hr_serviri:
+            filename = f"15_{filename}"
+        if use_iodc:
+            filename = f"iodc_{now_time}.zarr.zip"
+
+        save_file = os.path.join(save_dir, filename)
+        log.debug(f"Saving non-HRV netcdf in {save_file}", memory=get_memory())
+        save_to_zarr_to_backend(dataset, save_file, check_quality=lazy)
         del dataset
         gc.collect()
-        return
+        log.debug(f"Saved non-HRV file {save_file}", memory=get_memory())
 
-    filename = f"{now_time}.zarr.zip"
-    if use_hr_serviri:
-        filename = f"15_{filename}"
-    if use_iodc:
-        filename = f"iodc_{now_time}.zarr.zip"
 
-    save_file = os.path.join(save_dir, filename)
-    log.debug(f"Saving non-HRV netcdf in {save_file}", memory=get_memory())
-    save_to_zarr_to_backend(dataset, save_file)
-    del dataset
-    gc.collect()
-    log.debug(f"Saved non-HRV file {save_file}", memory=get_memory())
+def load_hrit_from_zip(filename: str, sections: list, extract_dir: str = None) -> Scene:
+    """Load HRIT Zip from Data Tailor to Scene for use downstream tasks
 
+    Only the prologue, epilogue and the wanted segments are extracted from the zip.
 
-def load_hrit_from_zip(filename: str, sections: list) -> Scene:
-    """Load HRIT Zip from Data Tailor to Scene for use downstream tasks"""
-    if os.path.exists("temp_hrit"):
-        shutil.rmtree("temp_hrit/")
-    with ZipFile(filename, "r") as zipObj:
-        # Extract all the contents of zip file in current directory
-        zipObj.extractall(path="temp_hrit")
+    Args:
+        filename: HRIT zip file from the Data Tailor
+        sections: Segment numbers to load
+        extract_dir: Directory to extract the files to. Satpy reads them lazily, so it must
+            be kept until the data has been computed. Use a separate directory for each call,
+            so several files can be loaded at the same time. Defaults to a new temporary
+            directory, which is left for the caller to remove.
+
+    Returns:
+        Scene of the extracted HRIT files
+    """
+    from satpy import Scene
+
+    if extract_dir is None:
+        extract_dir = tempfile.mkdtemp(prefix="satip_hrit_")
+
+    segments = [f"-0000{str(i).zfill(2)}" for i in sections]
     the_files = []
-    for f in list(glob.glob("temp_hrit/*")):
-        if "PRO" in f or "EPI" in f:
-            the_files.append(f)
-        for segment in [f"-0000{str(i).zfill(2)}" for i in sections]:
-            if segment in f:
-                the_files.append(f)
+    with ZipFile(filename, "r") as zipObj:
+        for member in zipObj.namelist():
+            name = os.path.basename(member)
+            if not name:
+                continue
+            if "PRO" in name or "EPI" in name or any(segment in name for segment in segments):
+                # Flatten the member into extract_dir, rather than trusting its path
+                extracted = os.path.join(extract_dir, name)
+                with zipObj.open(member) as fsrc, open(extracted, "wb") as fdst:
+                    shutil.copyfileobj(fsrc, fdst)
+                the_files.append(extracted)
     scene = Scene(filenames=the_files, reader="seviri_l1b_hrit")
     return scene
 
 
 def load_native_from_zip(filename: str) -> Scene:
     """Load native file"""
+    from satpy import Scene
+
     scene = Scene(filenames={"seviri_l1b_native": [filename]})
     return scene
 
 
+def load_hrv_and_nonhrv_scenes(filename: str, generate: bool = False) -> Tuple[Scene, Scene]:
+    """
+    Load all the bands of a native file with one Scene, then split off the HRV band
+
+    The file's headers are only parsed once, rather than once for each Scene.
+
+    Args:
+        filename: Native file to load
+        generate: Whether satpy should generate composites while loading
+
+    Returns:
+        Scene with the HRV band, and Scene with the non-HRV bands
+    """
+    scene = load_native_from_zip(filename)
+    scene.load(["HRV"] + NON_HRV_BANDS, generate=generate)
+    return scene.copy(datasets=["HRV"]), scene.copy(datasets=NON_HRV_BANDS)
+
+
 def save_native_to_zarr(
     list_of_native_files: list,
     bands: list = ALL_BANDS,
@@ -563,10 +702,20 @@ def save_native_to_zarr(
     use_rescaler: bool = False,
     use_hr_serviri: bool = False,
     use_iodc: bool = False,
-) -> None:
+    workers: int = 1,
+    max_memory_mb: float = None,
+    lazy: bool = False,
+    raise_errors: bool = True,
+) -> dict:
     """
     Saves native files to NetCDF for consumer
 
+    With more than one worker, the files are converted in parallel in separate processes.
+    A new file is only started while the memory used by this process and its workers is
+    below `max_memory_mb`, or once another file has finished. With any number of workers,
+    one bad file does not stop the rest. Once every file has been tried, an error is raised
+    if any failed, unless `raise_errors` is False, in which case the failures are returned.
+
     Args:
         list_of_native_files: List of native files to convert into a single NetCDF file
         bands: Bands to save
@@ -574,6 +723,16 @@ def save_native_to_zarr(
         use_rescaler: Whether to rescale between 0 and 1 or not
         use_hr_serviri: Whether the input data is the backup 15 minutely data or not
         use_iodc: Whether to use the IODC data or not
+        workers: Number of processes to convert files with, 1 converts them in this process
+        max_memory_mb: Memory limit for starting new files when using several workers,
+            defaults to 80% of the total memory
+        lazy: Whether to keep the data as dask arrays from loading to saving, so the peak
+            memory is bounded by the chunk size rather than the size of the scene
+        raise_errors: Whether to raise an error if any file failed to convert, rather than
+            only returning the failures
+
+    Returns:
+        Dictionary of each file to None if it was converted, otherwise the error message
     """
 
     log.debug(
@@ -581,39 +740,157 @@ def save_native_to_zarr(
         memory=get_memory(),
     )
 
+    convert = functools.partial(
+        convert_native_file,
+        bands=bands,
+        save_dir=save_dir,
+        use_rescaler=use_rescaler,
+        use_hr_serviri=use_hr_serviri,
+        use_iodc=use_iodc,
+        lazy=lazy,
+    )
+
+    results = {}
+    if workers <= 1 or len(list_of_native_files) <= 1:
+        for f in list_of_native_files:
+            try:
+                convert(f)
+                results[f] = None
+            except Exception as e:
+                results[f] = str(e)
+                log.error(f"Failed to convert {f}: {e}", memory=get_memory())
+    else:
+        _convert_in_processes(convert, list_of_native_files, results, workers, max_memory_mb)
+
+    failed = [f for f, error in results.items() if error is not None]
+    log.debug(
+        f"Finished processing files: {list_of_native_files}, {len(failed)} failed",
+        memory=get_memory(),
+    )
+    if raise_errors:
+        check_conversion_results(results)
+    return results
+
+
+def _convert_in_processes(
+    convert, list_of_native_files: list, results: dict, workers: int, max_memory_mb: float
+):
+    """Convert files in a pool of processes, adding the outcome of each file to `results`"""
+    if max_memory_mb is None:
+        import psutil
+
+        max_memory_mb = 0.8 * psutil.virtual_memory().total / 1024**2
+
+    # Spawn rather than fork the workers, as the download manager runs background threads
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        running = {}
+        files_to_convert = list(list_of_native_files)
+        while len(files_to_convert) > 0 or len(running) > 0:
+            memory_mb = get_total_memory_mb()
+            if (
+                len(files_to_convert) > 0
+                and len(running) < workers
+                and (len(running) == 0 or memory_mb < max_memory_mb)
+            ):
+                f = files_to_convert.pop(0)
+                log.debug(f"Starting {f}, using {memory_mb:.0f} MB", memory=get_memory())
+                running[executor.submit(convert, f)] = f
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                f = running.pop(future)
+                try:
+                    future.result()
+                    results[f] = None
+                except Exception as e:
+                    results[f] = str(e)
+                    log.error(f"Failed to convert {f}: {e}", memory=get_memory())
+
+
+def check_conversion_results(results: dict):
+    """
+    Raise an error if any of the files failed to convert
+
+    Args:
+        results: Dictionary of each file to None if it was converted, otherwise the error
+            message, as returned by `save_native_to_zarr`
+    """
+    failed = {f: error for f, error in results.items() if error is not None}
+    if len(failed) > 0:
+        raise RuntimeError(
+            f"Failed to convert {len(failed)} of {len(results)} files to zarr: {failed}"
+        )
+
+
+def convert_native_file(
+    f: str,
+    bands: list = ALL_BANDS,
+    save_dir: str = "./",
+    use_rescaler: bool = False,
+    use_hr_serviri: bool = False,
+    use_iodc: bool = False,
+    lazy: bool = False,
+) -> None:
+    """
+    Converts one native or HRIT file to the HRV and non-HRV zarr files
+
+    Args:
+        f: Native or HRIT file to convert
+        bands: Bands to save
+        save_dir: Directory to save the zarr files
+        use_rescaler: Whether to rescale between 0 and 1 or not
+        use_hr_serviri: Whether the input data is the backup 15 minutely data or not
+        use_iodc: Whether to use the IODC data or not
+        lazy: Whether to keep the data as dask arrays from loading to saving
+    """
     scaler = ScaleToZeroToOne(
         mins=SCALER_MINS,
         maxs=SCALER_MAXS,
         variable_order=NON_HRV_BANDS,
     )
     hrv_scaler = ScaleToZeroToOne(variable_order=["HRV"], maxs=HRV_SCALER_MAX, mins=HRV_SCALER_MIN)
-    for f in list_of_native_files:
-        log.debug(f"Processing {f}", memory=get_memory())
-        if use_iodc:
-            get_nonhrv_dataset_from_scene(f,
-                                          scaler,
-                                          use_rescaler,
-                                          save_dir,
-                                          False,
-                                          use_iodc=use_iodc)
-            # note we don't do any scaling with iodc
-        elif "EPCT" in f:
-            log.debug(f"Processing HRIT file {f}", memory=get_memory())
-            if "HRV" in f:
-                log.debug(f"Processing HRV {f}", memory=get_memory())
-                get_dataset_from_scene(f, hrv_scaler, use_rescaler, save_dir, use_hr_serviri)
-            else:
-                log.debug(f"Processing non-HRV {f}", memory=get_memory())
-                get_nonhrv_dataset_from_scene(f, scaler, use_rescaler, save_dir, use_hr_serviri)
-        else:
-            if "HRV" in bands:
-                log.debug(f"Processing HRV {f}", memory=get_memory())
-                get_dataset_from_scene(f, hrv_scaler, use_rescaler, save_dir, use_hr_serviri)
 
+    log.debug(f"Processing {f}", memory=get_memory())
+    if use_iodc:
+        get_nonhrv_dataset_from_scene(f,
+                                      scaler,
+                                      use_rescaler,
+                                      save_dir,
+                                      False,
+                                      use_iodc=use_iodc,
+                                      lazy=lazy)
+        # note we don't do any scaling with iodc
+    elif "EPCT" in f:
+        log.debug(f"Processing HRIT file {f}", memory=get_memory())
+        if "HRV" in f:
+            log.debug(f"Processing HRV {f}", memory=get_memory())
+            get_dataset_from_scene(
+                f, hrv_scaler, use_rescaler, save_dir, use_hr_serviri, lazy=lazy
+            )
+        else:
             log.debug(f"Processing non-HRV {f}", memory=get_memory())
-            get_nonhrv_dataset_from_scene(f, scaler, use_rescaler, save_dir, use_hr_serviri)
+            get_nonhrv_dataset_from_scene(
+                f, scaler, use_rescaler, save_dir, use_hr_serviri, lazy=lazy
+            )
+    else:
+        scene = None
+        if "HRV" in bands:
+            # Open the file once for both the HRV and non-HRV datasets
+            hrv_scene, scene = load_hrv_and_nonhrv_scenes(f)
+            log.debug(f"Processing HRV {f}", memory=get_memory())
+            get_dataset_from_scene(
+                f, hrv_scaler, use_rescaler, save_dir, use_hr_serviri, scene=hrv_scene, lazy=lazy
+            )
+            del hrv_scene
 
-        log.debug(f"Finished processing files: {list_of_native_files}", memory=get_memory())
+        log.debug(f"Processing non-HRV {f}", memory=get_memory())
+        get_nonhrv_dataset_from_scene(
+            f, scaler, use_rescaler, save_dir, use_hr_serviri, scene=scene, lazy=lazy
+        )
+        del scene
 
 
 def save_dataarray_to_zarr(
@@ -652,6 +929,9 @@ def save_dataarray_to_zarr(
     )
     dataarray = dataarray.chunk(chunks)
 
+    import numcodecs
+    from ocf_blosc2 import Blosc2
+
     compression_algos = {
         "bz2": numcodecs.get_codec(dict(id="bz2", level=5)),
         "blosc2": Blosc2(cname="zstd", clevel=5),
@@ -755,14 +1035,19 @@ def create_markdown_table(table_info: dict, index_name: str = "Id") -> str:
     return md_str
 
 
-def save_to_zarr_to_backend(dataset: xr.Dataset, filename: str):
+def save_to_zarr_to_backend(dataset: xr.Dataset, filename: str, check_quality: bool = False):
     """Save xarray to netcdf in a Database of your choice, by default: s3
 
     1. Save in temp local dir
     2. upload to the Database
     :param dataset: The Xarray Dataset to be save
     :param filename: The Database filename
+    :param check_quality: Run `data_quality_filter` in the same pass over the data as the
+        write, and only upload the file if it passes
+    :return: Whether the file was uploaded
     """
+    import dask
+    import zarr
 
     gc.collect()
     log.info(f"Saving file to {filename}", memory=get_memory())
@@ -778,7 +1063,17 @@ def save_to_zarr_to_backend(dataset: xr.Dataset, filename: str):
         log.debug(f"Dataset time: {dataset.time}", memory=get_memory())
 
         with zarr.ZipStore(path) as store:
-            dataset.to_zarr(store, compute=True, mode="w", encoding=encoding, consolidated=True)
+            if check_quality:
+                write = dataset.to_zarr(
+                    store, compute=False, mode="w", encoding=encoding, consolidated=True
+                )
+                _, fractions = dask.compute(write, zero_fractions(dataset))
+            else:
+                dataset.to_zarr(store, compute=True, mode="w", encoding=encoding, consolidated=True)
+
+        if check_quality and not data_quality_filter(dataset, fractions=fractions):
+            # The local file is removed with the temporary directory
+            return False
 
         new_times = xr.open_dataset(f"zip::{path}", engine="zarr").time
         log.debug(f"New times for {path}: {new_times}", memory=get_memory())
@@ -787,6 +1082,7 @@ def save_to_zarr_to_backend(dataset: xr.Dataset, filename: str):
         # save to Database
         filesystem = fsspec.open(filename).fs
         filesystem.put(path, filename)
+    return True
 
 
 def filter_dataset_ids_on_current_files(datasets: list, save_dir: str) -> list:
@@ -1105,9 +1401,27 @@ def get_memory() -> str:
     """
     Gets memory of process as a string
     """
+    import psutil
+
     return f"{psutil.Process(os.getpid()).memory_info().rss / 1024 ** 2} MB"
 
 
+def get_total_memory_mb() -> float:
+    """
+    Gets the memory of the process and all its child processes, in MB
+    """
+    import psutil
+
+    process = psutil.Process(os.getpid())
+    rss = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            rss += child.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return rss / 1024**2
+
+
 def move_files(dataset_id: str, data_dir_from, data_dir_to):
     """ Move files for dataset_id
 
@@ -1124,24 +1438,76 @@ def move_files(dataset_id: str, data_dir_from, data_dir_to):
 
     # get list of all files that match data_store_filename_remote
     fs_from = fsspec.open(data_dir_from).fs
-    fs_to = fsspec.open(data_dir_to).fs
     files = fs_from.glob(data_store_filename_from)
 
     if len(files) > 0:
-        # download the files to data_dir in
-        log.info(f'Copying files ({len(files)}) from native file store ({data_dir_from}) '
-                 f'to data directory ({data_dir_to})')
-        for file in files:
-            # get file name
-            file_name = file.split('/')[-1]
-
-            if hasattr(fs_to,'local_file'):
-                # copy file from remote to local
-                fs_from.get(file, data_dir_to + '/' + file_name)
-            else:
-                # copy file from local to remote
-                fs_to.put(file, data_dir_to + '/' + file_name)
+        copy_files(files, data_dir_from=data_dir_from, data_dir_to=data_dir_to)
     else:
         log.error(f'No files found for dataset_id {dataset_id} in {data_dir_from}')
 
     return files
+
+
+def copy_files(files: list, data_dir_from, data_dir_to):
+    """ Copy many files between directories at once
+
+    The files are passed to fsspec together, so remote filesystems like s3 transfer them
+    concurrently.
+
+    Args:
+        files: Files in data_dir_from to copy
+        data_dir_from: The directory to copy files from
+        data_dir_to: The directory to copy files to
+    """
+    fs_from = fsspec.open(data_dir_from).fs
+    fs_to = fsspec.open(data_dir_to).fs
+
+    # download the files to data_dir in
+    log.info(f'Copying files ({len(files)}) from native file store ({data_dir_from}) '
+             f'to data directory ({data_dir_to})')
+    destinations = [data_dir_to + '/' + file.split('/')[-1] for file in files]
+
+    if hasattr(fs_to, 'local_file'):
+        # copy files from remote to local
+        fs_from.get(list(files), destinations)
+    else:
+        # copy files from local to remote
+        fs_to.put(list(files), destinations)
+
+
+class NativeFileIndex:
+    """ Index of the files in a native file store, so the store is only listed once
+
+    Files in the store are named after the dataset id they come from, so the files of a
+    dataset are found by their name prefix.
+    """
+
+    def __init__(self, data_dir: str):
+        """ List the files in the native file store
+
+        Args:
+            data_dir: The native file store directory
+        """
+        self.data_dir = data_dir
+
+        filesystem = fsspec.open(data_dir).fs
+        files = filesystem.glob(f"{data_dir}/*")
+        self._files = sorted((file.split('/')[-1], file) for file in files)
+        self._names = [name for name, _ in self._files]
+        log.debug(f"Indexed {len(self._files)} files in native file store ({data_dir})")
+
+    def files(self, dataset_id: str) -> list:
+        """ Get the files in the store for dataset_id
+
+        Args:
+            dataset_id: The dataset id to look up
+
+        Returns:
+            List of files for the dataset
+        """
+        files = []
+        i = bisect.bisect_left(self._names, dataset_id)
+        while i < len(self._names) and self._names[i].startswith(dataset_id):
+            files.append(self._files[i][1])
+            i += 1
+        return files
@@ -0,0 +1,65 @@
+"""Script to benchmark how long the satip modules take to import.
+
+Each module is imported in a fresh interpreter, so nothing is already cached, and the
+heavy dependencies it pulls in are listed. The download and cleanup paths of the app
+should not need any of them.
+
+Usage example:
+  python3 scripts/benchmark_import_time.py --repeats 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+MODULES = ["satip.app", "satip.eumetsat", "satip.utils"]
+HEAVY_MODULES = ["satpy", "pyresample", "pyproj", "zarr", "dask", "psutil", "ocf_blosc2"]
+
+
+def benchmark_import(module: str, repeats: int = 5) -> dict:
+    """Import a module in fresh interpreters, timing the import
+
+    Args:
+        module: Name of the module to import
+        repeats: Number of times to import the module
+
+    Returns:
+        Dictionary of the median and minimum import times in seconds,
+        and the heavy dependencies which were imported
+    """
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "seconds = time.perf_counter() - start\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps({'seconds': seconds, 'heavy': heavy}))\n"
+    )
+    runs = []
+    for _ in range(repeats):
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+    times = [run["seconds"] for run in runs]
+    return {
+        "median_seconds": statistics.median(times),
+        "min_seconds": min(times),
+        "heavy_modules": runs[-1]["heavy"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    for module in MODULES:
+        result = benchmark_import(module, repeats=args.repeats)
+        print(
+            f"{module}: median {result['median_seconds']:.3f}s, "
+            f"min {result['min_seconds']:.3f}s, "
+            f"heavy modules imported: {result['heavy_modules'] or 'none'}"
+        )
@@ -32,8 +32,14 @@ def func(datasets_and_tuples_and_return_data):
         datasets = [datasets]
         api_key = os.environ["SAT_API_KEY"]
         api_secret = os.environ["SAT_API_SECRET"]
+        # All the worker processes share one rate limit, so the API doesn't throttle them
         download_manager = EUMETSATDownloadManager(
-            user_key=api_key, user_secret=api_secret, data_dir=tmpdir
+            user_key=api_key,
+            user_secret=api_secret,
+            data_dir=tmpdir,
+            max_requests_per_second=float(os.environ.get("SAT_MAX_REQUESTS_PER_SECOND", 10)),
+            max_bytes_per_second=float(os.environ.get("SAT_MAX_BYTES_PER_SECOND", 200e6)),
+            rate_limit_dir=os.environ.get("SAT_RATE_LIMIT_DIR", "/tmp/satip_rate_limit"),
         )
         download_manager.download_datasets(datasets)
         # 2. Load nat files to one Xarray Dataset
@@ -284,7 +290,7 @@ if __name__ == "__main__":
     for date in date_range[::-1]:
         start_date = pd.Timestamp(date) - pd.Timedelta("1M")
         end_date = pd.Timestamp(date) + pd.Timedelta("1min")
-        datasets = download_manager.identify_available_datasets(
+        datasets = download_manager.identify_available_datasets_in_windows(
             start_date=start_date.strftime("%Y-%m-%d-%H-%M-%S"),
             end_date=end_date.strftime("%Y-%m-%d-%H-%M-%S"),
         )
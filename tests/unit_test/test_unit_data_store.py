@@ -0,0 +1,102 @@
+"""Unit Tests for satip.data_store."""
+import io
+import os
+import tempfile
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from satip.data_store import BackgroundUploader, tee_stream
+
+
+def test_tee_stream():
+    data = os.urandom(10_000)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        local_filename = os.path.join(tmpdir, "local", "file")
+        remote_filename = os.path.join(tmpdir, "remote", "file")
+        os.makedirs(os.path.dirname(local_filename))
+
+        n_bytes = tee_stream(
+            io.BytesIO(data),
+            local_filename=local_filename,
+            remote_filename=remote_filename,
+            chunk_size=1024,
+            max_queued_chunks=2,
+        )
+
+        assert n_bytes == len(data)
+        for filename in [local_filename, remote_filename]:
+            with open(filename, "rb") as f:
+                assert f.read() == data
+
+
+def test_tee_stream_removes_partial_upload():
+    class BrokenStream(io.BytesIO):
+        def read(self, size=-1):
+            if self.tell() > 0:
+                raise OSError("Connection reset")
+            return super().read(size)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        remote_filename = os.path.join(tmpdir, "remote", "file")
+        with pytest.raises(OSError):
+            tee_stream(
+                BrokenStream(os.urandom(10_000)),
+                local_filename=os.path.join(tmpdir, "file"),
+                remote_filename=remote_filename,
+                chunk_size=1024,
+            )
+        assert not os.path.exists(remote_filename)
+
+
+def test_tee_stream_raises_when_the_upload_fails_to_close():
+    remote_file = MagicMock(closed=False)
+    remote_file.close.side_effect = OSError("Failed to complete the multipart upload")
+    fs = MagicMock()
+    fs.open.return_value = remote_file
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with patch("satip.data_store.fsspec.open") as fsspec_open:
+            fsspec_open.return_value.fs = fs
+            with pytest.raises(OSError, match="multipart"):
+                tee_stream(
+                    io.BytesIO(os.urandom(10_000)),
+                    local_filename=os.path.join(tmpdir, "file"),
+                    remote_filename="s3://bucket/remote/file",
+                    chunk_size=1024,
+                )
+        fs.rm.assert_called_once_with("s3://bucket/remote/file")
+
+
+def test_background_uploader():
+    release = threading.Event()
+    started = []
+
+    def move_files(dataset_id, data_dir_from, data_dir_to):
+        started.append(dataset_id)
+        assert release.wait(10)
+        if dataset_id == "bad":
+            raise OSError("Upload failed")
+
+    with patch("satip.data_store.utils.move_files", move_files):
+        uploader = BackgroundUploader("data", "store", max_queue_size=2, workers=2)
+        uploader.submit("good")
+        uploader.submit("bad")
+
+        # The queue is full, so the next submit waits for an upload to finish
+        third = threading.Thread(target=uploader.submit, args=("later",))
+        third.start()
+        third.join(0.1)
+        assert third.is_alive()
+        assert sorted(started) == ["bad", "good"]
+
+        release.set()
+        third.join(10)
+        assert uploader.join() == ["bad"]
+        assert uploader._executor is None
+
+        # The uploader can be used again after joining
+        uploader.submit("again")
+        assert uploader.join() == []
+    assert sorted(started) == ["again", "bad", "good", "later"]
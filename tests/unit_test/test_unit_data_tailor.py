@@ -0,0 +1,116 @@
+"""Unit Tests for satip.data_tailor."""
+import threading
+from types import SimpleNamespace
+
+from satip.data_tailor import CustomisationMonitor, CustomisationReaper
+
+
+class FakeDataTailor:
+    """Data Tailor whose customisations finish after a number of listings."""
+
+    def __init__(self, polls_until_done):
+        self.polls_until_done = polls_until_done
+        self.n_listings = 0
+
+    @property
+    def customisations(self):
+        self.n_listings += 1
+        return [
+            SimpleNamespace(
+                _id=customisation_id,
+                status="DONE" if self.n_listings > polls else "RUNNING",
+            )
+            for customisation_id, polls in self.polls_until_done.items()
+        ]
+
+
+def test_customisation_monitor_shares_one_listing():
+    datatailor = FakeDataTailor({"a": 2, "b": 4, "c": 6})
+    monitor = CustomisationMonitor(lambda: datatailor, min_interval=0.01, max_interval=0.05)
+
+    statuses = {}
+
+    def wait(customisation_id):
+        statuses[customisation_id] = monitor.wait(customisation_id, timeout=10)
+
+    threads = [threading.Thread(target=wait, args=(c,)) for c in ["a", "b", "c"]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statuses == {"a": "DONE", "b": "DONE", "c": "DONE"}
+    # Three jobs were watched with one listing per poll, rather than one each
+    assert datatailor.n_listings < 3 * 6
+
+    assert [status for _, status in monitor.customisations(max_age=60)] == ["DONE"] * 3
+
+
+def test_customisation_monitor_times_out():
+    datatailor = FakeDataTailor({"a": 1000})
+    monitor = CustomisationMonitor(lambda: datatailor, min_interval=0.01, max_interval=0.02)
+    assert monitor.wait("a", timeout=0.1) == "RUNNING"
+
+
+class FakeCustomisation:
+    """Customisation which records being killed and deleted."""
+
+    def __init__(self, customisation_id, status, actions):
+        self._id = customisation_id
+        self.status = status
+        self.actions = actions
+
+    def kill(self):
+        self.actions.append(("kill", self._id))
+
+    def delete(self):
+        self.actions.append(("delete", self._id))
+
+
+def test_customisation_reaper():
+    actions = []
+    customisations = [
+        FakeCustomisation("inactive", "INACTIVE", actions),
+        FakeCustomisation("failed", "FAILED", actions),
+        FakeCustomisation("running", "RUNNING", actions),
+    ]
+    datatailor = SimpleNamespace(customisations=customisations)
+    monitor = CustomisationMonitor(lambda: datatailor, min_interval=0.01)
+    reaper = CustomisationReaper(monitor, interval=60)
+
+    reaper.delete(FakeCustomisation("done", "DONE", actions))
+    reaper.stop(timeout=10)
+    # Stopping only deletes the queued customisations
+    assert actions == [("delete", "done")]
+
+    reaper.wake()
+    reaper.stop(timeout=10)
+    assert sorted(actions) == [
+        ("delete", "done"),
+        ("delete", "failed"),
+        ("delete", "inactive"),
+        ("kill", "inactive"),
+    ]
+    assert reaper.reclaimed_slots == 3
+
+
+def test_customisation_reaper_stop_is_bounded():
+    release = threading.Event()
+
+    class SlowCustomisation(FakeCustomisation):
+        def delete(self):
+            release.wait(10)
+            super().delete()
+
+    actions = []
+    monitor = CustomisationMonitor(lambda: SimpleNamespace(customisations=[]))
+    reaper = CustomisationReaper(monitor, interval=60)
+
+    reaper.delete(SlowCustomisation("slow", "DONE", actions))
+    # The deletion is left running in the background, rather than holding up the caller
+    assert not reaper.stop(timeout=0.05)
+    assert actions == []
+
+    release.set()
+    assert reaper.stop(timeout=10)
+    assert actions == [("delete", "slow")]
@@ -1,11 +1,39 @@
 """Unit Tests for satip.eumetsat."""
 import glob
+import io
 import os
-import tempfile
+import threading
+import zipfile
 from datetime import datetime, timezone, timedelta
 import pandas as pd
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from satip.eumetsat import (
+    DOWNLOAD_TIMEOUT_SECONDS,
+    PARTIAL_DOWNLOAD_DIR,
+    AccessTokenCache,
+    EUMETSATDownloadManager,
+    eumetsat_filename_to_datetime,
+    identify_available_datasets_in_windows,
+    identify_available_datasets_with_cache,
+)
+from satip.search_cache import SearchResultCache, datasets_in_range
+
+
+@pytest.fixture
+def download_manager(tmp_path):
+    """Download manager saving to a temporary directory, without requesting an access token"""
+    with patch("satip.eumetsat._request_access_token_and_expiry", return_value=("token", 3600)):
+        yield EUMETSATDownloadManager(
+            user_key="key",
+            user_secret="secret",
+            data_dir=str(tmp_path),
+            native_file_dir=str(tmp_path),
+        )
 
-from satip.eumetsat import EUMETSATDownloadManager, eumetsat_filename_to_datetime
 
 def test_filename_to_datetime():
     """If there were a test here, there would also be a docstring here."""
@@ -17,3 +45,310 @@ def test_filename_to_datetime():
     expected_datetime = datetime(2023, 8, 14, 8, 59, 17)
     actual_datetime = eumetsat_filename_to_datetime(filename)
     assert actual_datetime == expected_datetime
+
+
+def test_download_datasets_isolates_failures(download_manager):
+    """A failing dataset should not stop the rest of the pool from downloading."""
+    downloaded = []
+
+    def _download_dataset(dataset_id, product_id):
+        if dataset_id == "bad":
+            raise ValueError("Download failed")
+        downloaded.append(dataset_id)
+        return 10
+
+    download_manager._download_dataset = _download_dataset
+    failed = download_manager.download_datasets(
+        [{"id": "a"}, {"id": "bad"}, {"id": "b"}], concurrency=3
+    )
+
+    assert failed == ["bad"]
+    assert sorted(downloaded) == ["a", "b"]
+
+
+def test_download_tailored_datasets_hands_over_files_as_they_finish(download_manager):
+    """Finished files should be handed over while the other Data Tailor jobs are running."""
+    # The slow job only finishes once the fast one has been handed over
+    fast_handed_over = threading.Event()
+
+    def download(dataset_id, *args):
+        if dataset_id == "slow":
+            assert fast_handed_over.wait(10)
+        return [f"{dataset_id}.nat"]
+
+    completed = []
+
+    def on_complete(native_files):
+        completed.append(native_files)
+        fast_handed_over.set()
+
+    download_manager.download_single_tailored_dataset_with_retry = download
+    filenames = download_manager.download_tailored_datasets(
+        [{"id": "slow"}, {"id": "fast"}], concurrency=2, on_complete=on_complete
+    )
+
+    assert completed == [["fast.nat"], ["slow.nat"]]
+    assert sorted(filenames) == ["fast.nat", "slow.nat"]
+
+
+def test_download_tailored_datasets_carries_on_after_a_failure(download_manager):
+    """A failed dataset should not stop the ones queued behind it from being handed over."""
+
+    def download(dataset_id, *args):
+        if dataset_id == "a_bad":
+            raise ValueError("Customisation failed")
+        return [f"{dataset_id}.nat"]
+
+    completed = []
+    download_manager.download_single_tailored_dataset_with_retry = download
+    # With one job at a time, the other datasets are queued behind the failing one
+    with pytest.raises(ValueError, match="Customisation failed"):
+        download_manager.download_tailored_datasets(
+            [{"id": "a_bad"}, {"id": "b"}, {"id": "c"}],
+            concurrency=1,
+            on_complete=completed.append,
+        )
+
+    assert sorted(completed) == [["b.nat"], ["c.nat"]]
+
+
+def test_access_token_cache_refreshes_before_expiry():
+    """The token should be reused until it is within the refresh margin of expiring."""
+    requested = []
+
+    def request_token(lifetime):
+        requested.append(lifetime)
+        return f"token_{len(requested)}", lifetime
+
+    cache = AccessTokenCache(lambda: request_token(100), refresh_margin_seconds=10)
+    assert cache.get() == "token_1"
+    assert cache.get() == "token_1"
+
+    # Invalidating an older token should not drop the current one
+    cache.invalidate("token_0")
+    assert cache.get() == "token_1"
+
+    cache.invalidate("token_1")
+    assert cache.get() == "token_2"
+
+    # A token which expires within the margin is refreshed every time
+    cache = AccessTokenCache(lambda: request_token(5), refresh_margin_seconds=10)
+    assert cache.get() == "token_3"
+    assert cache.get() == "token_4"
+
+
+def test_identify_available_datasets_in_windows():
+    """Windows should cover the whole range, and overlapping results be de-duplicated."""
+    searched_windows = []
+
+    def identify_available_datasets(start_date, end_date, product_id, session):
+        searched_windows.append((start_date, end_date))
+        # Every window also returns the product on the boundary with the next window
+        return [
+            {"id": f"product_{start_date}", "properties": {"date": f"{start_date}/{start_date}"}},
+            {"id": "boundary", "properties": {"date": "2020-01-02T00:00:00/2020-01-02T00:00:00"}},
+        ]
+
+    with patch("satip.eumetsat.identify_available_datasets", identify_available_datasets):
+        datasets = identify_available_datasets_in_windows(
+            "2020-01-01 00:00", "2020-01-03 12:00", window="1D", concurrency=2
+        )
+
+    assert sorted(searched_windows) == [
+        ("2020-01-01T00:00:00", "2020-01-02T00:00:00"),
+        ("2020-01-02T00:00:00", "2020-01-03T00:00:00"),
+        ("2020-01-03T00:00:00", "2020-01-03T12:00:00"),
+    ]
+    assert [dataset["id"] for dataset in datasets] == [
+        "product_2020-01-03T00:00:00",
+        "product_2020-01-02T00:00:00",
+        "boundary",
+        "product_2020-01-01T00:00:00",
+    ]
+
+
+def test_identify_available_datasets_with_cache(tmp_path):
+    """Only buckets which are not cached should be searched, merging neighbouring ones."""
+    all_datasets = [
+        {"id": dataset_id, "properties": {"date": f"2020-01-01T{start}Z/2020-01-01T{end}Z"}}
+        for dataset_id, start, end in [
+            ("before_range", "12:01", "12:02"),
+            ("b", "12:16", "12:17"),
+            # Nothing is published for the 12:30 bucket
+            ("d", "12:46", "12:47"),
+            ("after_range", "12:55", "12:56"),
+        ]
+    ]
+    searched_windows = []
+
+    def identify_available_datasets(start_date, end_date, product_id, session):
+        searched_windows.append((pd.Timestamp(start_date), pd.Timestamp(end_date)))
+        return datasets_in_range(all_datasets, start_date, end_date)
+
+    def search(cache):
+        searched_windows.clear()
+        datasets = identify_available_datasets_with_cache(
+            "2020-01-01 12:05", "2020-01-01 12:50", product_id="product", cache=cache
+        )
+        return [dataset["id"] for dataset in datasets]
+
+    with patch("satip.eumetsat.identify_available_datasets", identify_available_datasets):
+        cache = SearchResultCache(str(tmp_path), bucket="15min", closed_after="0min")
+
+        # A cold cache searches all the buckets at once
+        assert search(cache) == ["d", "b"]
+        assert searched_windows == [
+            (pd.Timestamp("2020-01-01 12:00", tz="UTC"), pd.Timestamp("2020-01-01 13:00", tz="UTC"))
+        ]
+
+        # A warm cache only searches the empty bucket, which may be published late
+        assert search(cache) == ["d", "b"]
+        assert searched_windows == [
+            (pd.Timestamp("2020-01-01 12:30", tz="UTC"), pd.Timestamp("2020-01-01 12:45", tz="UTC"))
+        ]
+
+
+def test_eumdac_clients_are_shared_until_the_token_is_refreshed(download_manager):
+    """The eumdac clients should only be remade when the eumdac token changes."""
+    with patch("satip.eumetsat.eumdac") as eumdac:
+        download_manager.eumdac_token_cache.request_token = lambda: (object(), 3600)
+
+        datatailor = download_manager.eumdac_datatailor
+        assert download_manager.eumdac_datatailor is datatailor
+        assert download_manager.eumdac_datastore is download_manager.eumdac_datastore
+        assert eumdac.DataTailor.call_count == 1
+        assert eumdac.DataStore.call_count == 1
+
+        download_manager.eumdac_token_cache.invalidate()
+        download_manager.eumdac_datatailor
+        assert eumdac.DataTailor.call_count == 2
+        assert eumdac.DataStore.call_count == 2
+
+
+def _zipped_native_file() -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zipped_files:
+        zipped_files.writestr("product.nat", os.urandom(1000))
+        zipped_files.writestr("product.xml", "metadata")
+    return buffer.getvalue()
+
+
+class FakeResponse:
+    """Streamed response, whose content can break off with an exception."""
+
+    def __init__(self, status_code, headers=None, chunks=()):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.chunks = chunks
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(str(self.status_code))
+
+    def iter_content(self, chunk_size):
+        for chunk in self.chunks:
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+
+
+class FakeSession:
+    """Session returning the given responses in turn, and recording the requests."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, **kwargs):
+        self.requests.append(kwargs)
+        return self.responses.pop(0)
+
+
+@pytest.mark.parametrize(
+    "n_bytes_on_disk, response, expected_range",
+    [
+        # Fresh download
+        (0, lambda data, n: FakeResponse(200, {"Content-Length": str(len(data))}, [data]), None),
+        # Resumed with a partial response
+        (
+            100,
+            lambda data, n: FakeResponse(
+                206, {"Content-Range": f"bytes {n}-{len(data) - 1}/{len(data)}"}, [data[n:]]
+            ),
+            "bytes=100-",
+        ),
+        # The part file already holds the whole zip
+        (-1, lambda data, n: FakeResponse(416), "bytes={}-"),
+        # The server ignored the Range header, so the zip is downloaded again
+        (
+            100,
+            lambda data, n: FakeResponse(200, {"Content-Length": str(len(data))}, [data]),
+            "bytes=100-",
+        ),
+    ],
+)
+def test_download_single_dataset(
+    download_manager, n_bytes_on_disk, response, expected_range
+):
+    """Downloads should resume from the part file, whatever the server replies with."""
+    data = _zipped_native_file()
+    n_bytes_on_disk = len(data) if n_bytes_on_disk == -1 else n_bytes_on_disk
+
+    os.makedirs(os.path.join(download_manager.data_dir, PARTIAL_DOWNLOAD_DIR))
+    with open(os.path.join(download_manager.data_dir, PARTIAL_DOWNLOAD_DIR, "product.zip.part"), "wb") as f:
+        f.write(data[:n_bytes_on_disk])
+    download_manager.session = FakeSession([response(data, n_bytes_on_disk)])
+
+    download_manager.download_single_dataset("https://api.eumetsat.int/products/product")
+
+    request = download_manager.session.requests[0]
+    assert request["timeout"] == DOWNLOAD_TIMEOUT_SECONDS
+    assert request["headers"].get("Range") == (
+        expected_range.format(len(data)) if expected_range else None
+    )
+    # Only the native file is extracted, and the part file is removed
+    assert sorted(os.listdir(download_manager.data_dir)) == [PARTIAL_DOWNLOAD_DIR, "product.nat"]
+    assert os.listdir(os.path.join(download_manager.data_dir, PARTIAL_DOWNLOAD_DIR)) == []
+
+
+def test_download_single_dataset_resumes_after_a_timeout(download_manager):
+    """A stalled transfer should be resumed from the last byte on disk."""
+    data = _zipped_native_file()
+    download_manager.session = FakeSession(
+        [
+            FakeResponse(
+                200,
+                {"Content-Length": str(len(data))},
+                [data[:100], requests.exceptions.ReadTimeout("Read timed out")],
+            ),
+            FakeResponse(
+                206, {"Content-Range": f"bytes 100-{len(data) - 1}/{len(data)}"}, [data[100:]]
+            ),
+        ]
+    )
+
+    n_bytes = download_manager.download_single_dataset(
+        "https://api.eumetsat.int/products/product"
+    )
+
+    assert n_bytes == len(data)
+    assert download_manager.session.requests[1]["headers"] == {"Range": "bytes=100-"}
+    assert os.path.exists(os.path.join(download_manager.data_dir, "product.nat"))
+
+
+def test_download_single_dataset_checks_the_size(download_manager):
+    """A download which ends early without an error should not be extracted."""
+    data = _zipped_native_file()
+    download_manager.session = FakeSession(
+        [FakeResponse(200, {"Content-Length": str(len(data))}, [data[:100]])]
+    )
+
+    with pytest.raises(IOError, match="expected"):
+        download_manager.download_single_dataset("https://api.eumetsat.int/products/product")
+    assert not os.path.exists(os.path.join(download_manager.data_dir, "product.nat"))
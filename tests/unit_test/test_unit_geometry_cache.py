@@ -0,0 +1,67 @@
+"""Unit Tests for satip.geometry_cache."""
+import hashlib
+import os
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+
+from satip.geometry_cache import CropSliceCache, OSGBGridCache
+
+
+class FakeArea:
+    """Area definition with a fixed hash."""
+
+    area_extent = (0, 0, 1, 1)
+
+    def __init__(self, name):
+        self.name = name
+
+    def update_hash(self):
+        return hashlib.sha1(self.name.encode())
+
+
+def test_crop_slice_cache():
+    bounds = (-17, 44, 11, 73)
+    slices = ((1, 10), (2, 20))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = CropSliceCache(cache_dir=tmpdir)
+        assert cache.get(FakeArea("rss"), bounds) is None
+
+        cache.put(FakeArea("rss"), bounds, slices)
+        assert cache.get(FakeArea("rss"), bounds) == slices
+        assert cache.get(FakeArea("rss"), (60, 6, 97, 37)) is None
+        assert cache.get(FakeArea("iodc"), bounds) is None
+
+        # A new cache, such as in the next run, reads the slices from disk
+        assert CropSliceCache(cache_dir=tmpdir).get(FakeArea("rss"), bounds) == slices
+
+    # Areas which cannot be hashed, such as swaths, are not cached
+    cache = CropSliceCache()
+    cache.put(object(), bounds, slices)
+    assert cache.get(object(), bounds) is None
+
+
+def test_osgb_grid_cache():
+    x_osgb = np.arange(12, dtype=np.float64).reshape(3, 4)
+    y_osgb = -x_osgb
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = OSGBGridCache(cache_dir=tmpdir)
+        assert cache.get(FakeArea("uk")) is None
+
+        grids = cache.put(FakeArea("uk"), x_osgb, y_osgb)
+        assert all(grid.dtype == np.float32 for grid in grids)
+        assert cache.get(FakeArea("uk")) is grids
+
+        # A new cache, such as in the next run, memory-maps the grids from disk
+        x_cached, y_cached = OSGBGridCache(cache_dir=tmpdir, mmap=True).get(FakeArea("uk"))
+        assert isinstance(x_cached, np.memmap)
+        np.testing.assert_array_equal(x_cached, x_osgb)
+        np.testing.assert_array_equal(y_cached, y_osgb)
+        assert OSGBGridCache(cache_dir=tmpdir).get(FakeArea("india")) is None
+
+        # Memory-mapping can be turned on for caches made without it, like the module-wide one
+        with patch.dict(os.environ, {"SATIP_GEOMETRY_CACHE_MMAP": "true"}):
+            x_cached, _ = OSGBGridCache(cache_dir=tmpdir).get(FakeArea("uk"))
+        assert isinstance(x_cached, np.memmap)
+        assert not isinstance(OSGBGridCache(cache_dir=tmpdir).get(FakeArea("uk"))[0], np.memmap)
@@ -0,0 +1,62 @@
+"""Unit Tests for satip.geospatial."""
+import threading
+
+import numpy as np
+
+from satip.geospatial import (
+    OSGB,
+    WGS84,
+    Transformers,
+    geostationary_to_lat_lon,
+    get_transformer,
+    lat_lon_to_geostationary,
+    lat_lon_to_osgb,
+    lat_lon_to_osgb_grid,
+    lat_lon_to_utm_india,
+)
+
+
+def test_lat_lon_to_osgb_grid():
+    lon, lat = np.meshgrid(np.linspace(-10, 2, 40), np.linspace(50, 60, 30))
+    # Pixels off the edge of the disk
+    lat[0, :5] = np.inf
+    lon[1, :5] = np.nan
+
+    x, y = lat_lon_to_osgb_grid(lat, lon, tile_size=100, workers=4)
+    assert x.dtype == np.float32 and y.dtype == np.float32
+    assert x.shape == lat.shape
+
+    on_disk = np.isfinite(lat) & np.isfinite(lon)
+    assert np.isinf(x[~on_disk]).all() and np.isinf(y[~on_disk]).all()
+
+    expected_x, expected_y = lat_lon_to_osgb(lat[on_disk], lon[on_disk])
+    np.testing.assert_allclose(x[on_disk], expected_x, rtol=1e-6)
+    np.testing.assert_allclose(y[on_disk], expected_y, rtol=1e-6)
+
+
+def test_get_transformer_is_cached_per_thread():
+    transformer = get_transformer(WGS84, OSGB)
+    assert get_transformer(WGS84, OSGB) is transformer
+
+    other_thread_transformers = []
+    thread = threading.Thread(
+        target=lambda: other_thread_transformers.append(get_transformer(WGS84, OSGB))
+    )
+    thread.start()
+    thread.join()
+    assert other_thread_transformers[0] is not transformer
+
+    # The old interface gives the same coordinates
+    np.testing.assert_allclose(
+        lat_lon_to_osgb(51.5, -0.1), Transformers().lat_lon_to_osgb.transform(51.5, -0.1)
+    )
+
+
+def test_other_projections():
+    lat, lon = 28.6, 77.2
+    x, y = lat_lon_to_geostationary(lat, lon, satellite="IODC")
+    np.testing.assert_allclose(geostationary_to_lat_lon(x, y, satellite="IODC"), (lat, lon))
+
+    # UTM zone 44N is centred on 81 deg east, with a false easting of 500 km
+    x, y = lat_lon_to_utm_india(lat, 81)
+    assert abs(x - 500_000) < 1
@@ -0,0 +1,18 @@
+"""Guards against the satip modules importing heavy dependencies at import time."""
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ["satpy", "pyresample", "pyproj", "zarr", "dask", "psutil", "ocf_blosc2"]
+
+
+@pytest.mark.parametrize("module", ["satip.app", "satip.eumetsat", "satip.utils"])
+def test_import_does_not_load_heavy_dependencies(module):
+    code = (
+        f"import sys, {module}\n"
+        f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
@@ -0,0 +1,25 @@
+"""Unit Tests for satip.rate_limit."""
+import os
+import tempfile
+
+import pytest
+
+from satip.rate_limit import TokenBucket
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_token_bucket(shared):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        state_file = os.path.join(tmpdir, "requests.json") if shared else None
+        bucket = TokenBucket(rate=100, capacity=10, state_file=state_file)
+
+        # A full bucket lets a burst of `capacity` through without waiting
+        assert bucket.acquire(10) == 0
+
+        # Then the bucket has to refill, at 100 tokens per second
+        waited = bucket.acquire(5)
+        assert 0 < waited < 1
+
+        # A second bucket on the same state file shares the empty bucket
+        if shared:
+            assert TokenBucket(rate=100, capacity=10, state_file=state_file).acquire(5) > 0
@@ -5,7 +5,7 @@ import numpy as np
 import pandas as pd
 import xarray as xr
 
-from satip.scale_to_zero_to_one import ScaleToZeroToOne, is_dataset_clean
+from satip.scale_to_zero_to_one import ScaleToZeroToOne, is_dataset_clean, rescale_to_range
 
 
 @pytest.fixture
@@ -98,3 +98,19 @@ class TestScaleToZeroToOne:
 
         # While we are at it, let's also test the is_dataset_clean-method:
         assert is_dataset_clean(dataset)
+
+    def test_rescale_to_range(self, dataset):
+        mins, maxs = np.asarray([-5, 0]), np.asarray([5, 20])
+        expected = dataset.transpose("time", "y_geostationary", "x_geostationary", "variable")
+        expected = (((expected - mins) / (maxs - mins)) * 1023).clip(0, 1023).astype(np.float32)
+
+        rescaled = rescale_to_range(dataset, mins, maxs, variable_order=[0, 1], upper_bound=1023)
+        assert rescaled.dtype == np.float32
+        xr.testing.assert_allclose(rescaled, expected)
+
+        # Dask arrays stay lazy until computed
+        rescaled = rescale_to_range(
+            dataset.chunk({"time": 2, "variable": 1}), mins, maxs, [0, 1], upper_bound=1023
+        )
+        assert rescaled.chunks is not None
+        xr.testing.assert_allclose(rescaled.compute(), expected)
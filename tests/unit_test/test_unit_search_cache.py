@@ -0,0 +1,51 @@
+"""Unit Tests for satip.search_cache."""
+import os
+import tempfile
+
+import pandas as pd
+
+from satip.search_cache import SearchResultCache, datasets_in_range
+
+
+def _dataset(id, start, end):
+    return {"id": id, "properties": {"date": f"{start}/{end}"}}
+
+
+def test_datasets_in_range():
+    datasets = [
+        _dataset("before", "2020-01-01T11:40:00Z", "2020-01-01T11:45:00Z"),
+        _dataset("overlapping", "2020-01-01T11:55:00Z", "2020-01-01T12:00:00Z"),
+        _dataset("inside", "2020-01-01T12:05:00Z", "2020-01-01T12:10:00Z"),
+    ]
+    filtered = datasets_in_range(datasets, "2020-01-01 11:58", "2020-01-01 12:15")
+    assert [dataset["id"] for dataset in filtered] == ["overlapping", "inside"]
+
+
+def test_search_result_cache():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = SearchResultCache(tmpdir, bucket="15min", closed_after="30min", max_entries=2)
+
+        buckets = cache.buckets("2020-01-01 12:05", "2020-01-01 12:35")
+        assert buckets == list(
+            pd.date_range("2020-01-01 12:00", "2020-01-01 12:30", freq="15min", tz="UTC")
+        )
+
+        now = pd.Timestamp("2020-01-01 13:00", tz="UTC")
+        assert cache.is_closed(buckets[0], now=now)
+        assert not cache.is_closed(buckets[-1], now=now)
+
+        assert cache.get("product", buckets[0]) is None
+        # Empty results are not cached, as the products may be published late
+        cache.put("product", buckets[0], [])
+        assert cache.get("product", buckets[0]) is None
+
+        datasets = [_dataset("a", "2020-01-01T12:00:00Z", "2020-01-01T12:05:00Z")]
+        for bucket in buckets:
+            cache.put("product", bucket, datasets)
+        assert cache.get("product", buckets[0]) == datasets
+
+        # Only the newest `max_entries` buckets are kept
+        os.utime(cache._path("product", buckets[0]), (0, 0))
+        cache.evict()
+        assert cache.get("product", buckets[0]) is None
+        assert cache.get("product", buckets[1]) == datasets
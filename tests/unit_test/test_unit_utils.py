@@ -0,0 +1,149 @@
+"""Unit Tests for satip.utils."""
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+from zipfile import ZipFile
+
+import dask.array as da
+import numpy as np
+import pytest
+import xarray as xr
+
+from satip.constants import NON_HRV_BANDS
+from satip.utils import (
+    NativeFileIndex,
+    check_conversion_results,
+    copy_files,
+    data_quality_filter,
+    load_hrit_from_zip,
+    load_hrv_and_nonhrv_scenes,
+    save_native_to_zarr,
+    save_to_zarr_to_backend,
+)
+
+
+def test_native_file_index_and_copy_files():
+    dataset_id = "MSG4-SEVI-MSG15-0100-NA-20230814075918.739000000Z-NA"
+    other_dataset_id = "MSG4-SEVI-MSG15-0100-NA-20230814080418.739000000Z-NA"
+    with tempfile.TemporaryDirectory() as store_dir, tempfile.TemporaryDirectory() as data_dir:
+        for filename in [f"{dataset_id}.nat", f"{dataset_id}.xml", f"{other_dataset_id}.nat"]:
+            open(os.path.join(store_dir, filename), "w").close()
+
+        index = NativeFileIndex(store_dir)
+        files = index.files(dataset_id)
+        assert sorted(file.split("/")[-1] for file in files) == [
+            f"{dataset_id}.nat",
+            f"{dataset_id}.xml",
+        ]
+        assert index.files("MSG4-SEVI-MSG15-0100-NA-20230814085918.739000000Z-NA") == []
+
+        copy_files(files, data_dir_from=store_dir, data_dir_to=data_dir)
+        assert sorted(os.listdir(data_dir)) == [f"{dataset_id}.nat", f"{dataset_id}.xml"]
+
+
+def test_load_hrit_from_zip_extracts_only_needed_members():
+    prefix = "H-000-MSG4__-MSG4________-"
+    members = [
+        f"{prefix}_________-PRO______-202308140800-__",
+        f"{prefix}_________-EPI______-202308140800-__",
+        f"HRIT/{prefix}IR_016___-000006___-202308140800-C_",
+        f"{prefix}IR_016___-000001___-202308140800-C_",
+        f"{prefix}HRV______-000016___-202308140800-C_",
+    ]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, "hrit.zip")
+        with ZipFile(filename, "w") as zip_file:
+            for member in members:
+                zip_file.writestr(member, member)
+
+        extract_dir = os.path.join(tmpdir, "extracted")
+        os.makedirs(extract_dir)
+        with patch("satpy.Scene") as scene:
+            load_hrit_from_zip(filename, sections=range(6, 9), extract_dir=extract_dir)
+
+        expected = sorted(os.path.basename(member) for member in members[:3])
+        assert sorted(os.listdir(extract_dir)) == expected
+        (filenames,) = [call.kwargs["filenames"] for call in scene.call_args_list]
+        assert sorted(os.path.basename(f) for f in filenames) == expected
+
+        # Without an extract_dir, the files are extracted to a new temporary directory
+        with patch("satpy.Scene") as scene:
+            load_hrit_from_zip(filename, range(6, 9))
+        (filenames,) = [call.kwargs["filenames"] for call in scene.call_args_list]
+        default_dir = os.path.dirname(filenames[0])
+        assert default_dir != extract_dir
+        assert sorted(os.listdir(default_dir)) == expected
+        shutil.rmtree(default_dir)
+
+
+def test_load_hrv_and_nonhrv_scenes_opens_the_file_once():
+    with patch("satpy.Scene") as scene:
+        load_hrv_and_nonhrv_scenes("file.nat")
+
+    scene.assert_called_once_with(filenames={"seviri_l1b_native": ["file.nat"]})
+    scene.return_value.load.assert_called_once_with(["HRV"] + NON_HRV_BANDS, generate=False)
+    assert [call.kwargs["datasets"] for call in scene.return_value.copy.call_args_list] == [
+        ["HRV"],
+        NON_HRV_BANDS,
+    ]
+
+
+def test_save_native_to_zarr_collects_errors_from_workers():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with patch("satip.utils.convert_native_file") as convert_native_file:
+            results = save_native_to_zarr(["a.nat", "b.nat"], save_dir=tmpdir)
+        assert results == {"a.nat": None, "b.nat": None}
+        assert convert_native_file.call_count == 2
+
+        # Files which fail to convert are reported, rather than stopping the others,
+        # whether they are converted in this process or in workers
+        missing_files = [os.path.join(tmpdir, f"missing_{i}.nat") for i in range(2)]
+        for workers in [1, 2]:
+            results = save_native_to_zarr(
+                missing_files, save_dir=tmpdir, workers=workers, raise_errors=False
+            )
+            assert sorted(results) == missing_files
+            assert all(error is not None for error in results.values())
+            with pytest.raises(RuntimeError, match="Failed to convert 2 of 2 files"):
+                check_conversion_results(results)
+
+            # By default, the failures are raised once every file has been tried
+            with pytest.raises(RuntimeError, match="Failed to convert 2 of 2 files"):
+                save_native_to_zarr(missing_files, save_dir=tmpdir, workers=workers)
+
+        check_conversion_results({"a.nat": None})
+
+
+def test_data_quality_filter_is_lazy_on_dask_arrays():
+    data = np.ones((2, 64, 64), dtype=np.float32)
+    data[0] = 0.0
+    ds = xr.Dataset({"data": (("time", "y", "x"), da.from_array(data, chunks=(1, 16, 16)))})
+    assert data_quality_filter(ds, threshold_fraction=0.9)
+    assert not data_quality_filter(ds, threshold_fraction=0.4)
+    # The filter reads the data, but leaves it as a dask array
+    assert isinstance(ds["data"].data, da.Array)
+
+
+def test_save_to_zarr_to_backend_checks_quality_while_saving():
+    data = np.ones((1, 64, 64, 1), dtype=np.float32)
+    data[:, :60] = 0.0
+    ds = xr.Dataset(
+        {
+            "data": (
+                ("time", "y_geostationary", "x_geostationary", "variable"),
+                da.from_array(data, chunks=(1, 16, 16, 1)),
+            )
+        },
+        coords={"time": [np.datetime64("2020-01-01T12:00")], "variable": ["IR_016"]},
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, "bad.zarr.zip")
+        assert not save_to_zarr_to_backend(ds, filename, check_quality=True)
+        assert not os.path.exists(filename)
+
+        ds["data"] = ds["data"] + 1
+        filename = os.path.join(tmpdir, "good.zarr.zip")
+        assert save_to_zarr_to_backend(ds, filename, check_quality=True)
+        saved = xr.open_dataset(f"zip::{filename}", engine="zarr")
+        np.testing.assert_array_equal(saved["data"].values, data + 1)